@@ -0,0 +1,143 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException
+
+from metrics import ADMISSION_REJECTED
+
+
+class AdmissionRejected(HTTPException):
+    """A shed request: 429 when the caller is over its rate, 503 when the route is saturated."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(status_code=status_code, detail=detail,
+                         headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Per-key token buckets refilled at ``rate`` per second up to ``burst``, LRU-bounded."""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    def take(self, key: str) -> float:
+        """Spend one token for ``key``; returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            while len(self._buckets) > self.max_keys:
+                # An evicted key comes back with a full bucket, which is at most one extra burst
+                self._buckets.popitem(last=False)
+        else:
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        self._buckets.move_to_end(key)
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class AdmissionController:
+    """Admission for one expensive route.
+
+    ``throttle(key)`` applies a per-key token bucket. ``slot()`` admits at
+    most ``max_concurrency`` calls at once; up to ``max_queue`` more wait for
+    at most ``queue_timeout`` seconds, and anything beyond that is rejected
+    straight away so it never ties up a worker. Retry-After on a 503 is
+    estimated from the recent service time and the queue ahead.
+    """
+
+    def __init__(self, name: str, max_concurrency: int = 8, max_queue: int = 32,
+                 queue_timeout: float = 2.0, rate: Optional[float] = None, burst: float = 5.0,
+                 max_keys: int = 10000):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.buckets = TokenBucket(rate, burst, max_keys) if rate else None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = {"rate_limited": 0, "queue_full": 0, "queue_timeout": 0}
+        self.service_seconds = 1.0  # moving average, seeded pessimistically
+
+    def _reject(self, reason: str, status_code: int, detail: str, retry_after: float):
+        self.rejected[reason] += 1
+        ADMISSION_REJECTED.inc(self.name, reason)
+        raise AdmissionRejected(status_code, detail, retry_after)
+
+    def _busy_for(self) -> float:
+        return self.service_seconds * (self.waiting + 1) / self.max_concurrency
+
+    def throttle(self, key: str):
+        if self.buckets is None:
+            return
+        wait = self.buckets.take(key)
+        if wait:
+            self._reject("rate_limited", 429, "Too many requests, slow down", wait)
+
+    def check_capacity(self):
+        """Reject now if ``acquire`` would find the queue full, without taking anything."""
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self._reject("queue_full", 503, "Assistant is busy, try again shortly", self._busy_for())
+
+    async def acquire(self) -> float:
+        """Take a slot; returns a ticket to hand back to ``release``."""
+        if self._semaphore.locked():
+            self.check_capacity()
+            self.waiting += 1
+            self.queued += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject("queue_timeout", 503, "Assistant is busy, try again shortly", self._busy_for())
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        self.admitted += 1
+        return time.monotonic()
+
+    def release(self, ticket: float):
+        self.in_flight -= 1
+        self._semaphore.release()
+        self.service_seconds = 0.8 * self.service_seconds + 0.2 * (time.monotonic() - ticket)
+
+    @asynccontextmanager
+    async def slot(self):
+        ticket = await self.acquire()
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "route": self.name,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": dict(self.rejected),
+            "avg_service_ms": round(self.service_seconds * 1000, 1),
+            "rate_limited_keys": len(self.buckets) if self.buckets is not None else 0,
+        }
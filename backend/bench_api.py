@@ -0,0 +1,303 @@
+"""Offline load test of the API: p50/p99 latency and requests/sec per route.
+
+    python bench_api.py                          # 1k and 10k documents per collection
+    python bench_api.py --sizes 1000 --requests 500 --concurrency 16
+    python bench_api.py --mongo-url mongodb://localhost:27017 --sizes 1000 10000 100000
+    python bench_api.py --save-baseline          # record results as the new baseline
+    python bench_api.py --check                  # exit 1 on regressions against the baseline
+
+By default the app runs in-process over ASGI against mongomock-motor and the
+fake LLM, so results measure the server's own overhead, not a real database
+or provider. The catalog routes run twice: warm, served from the catalog
+cache, and cold, with the collection's cache version bumped before every
+request so each one reaches the database. The production indexes are created
+before seeding.
+
+Scope on mongomock: the recorded baseline covers the 1k and 10k tiers only.
+Mongomock enforces unique indexes by scanning the collection on every insert,
+so seeding grows quadratically: 10k documents take several minutes and 100k
+would take most of a day. Mongomock also answers ``$in`` with a full scan,
+which is why /search is run with SEARCH_COLLECTION_TIMEOUT raised to 60s
+there; its end-to-end figures are the stand-in's cost, not the server's, and
+would not fit the production 0.5s budget. The "(index)" and "(hydration)"
+rows split /search into the in-process index lookup and the per-collection
+``$in`` fetch so the two can be read separately.
+
+``--mongo-url`` runs against a real mongod instead (the DB_NAME database,
+"bench" by default, is wiped). The production search timeout then applies,
+a search that comes back partial counts as an error, the 100k tier is
+practical, and results go to a separate baseline file. Baselines are
+machine-specific; record one on the machine you compare on.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+# Read before server.py is imported, since its module-level client binds on import
+_backend = argparse.ArgumentParser(add_help=False)
+_backend.add_argument("--mongo-url")
+MONGO_URL = _backend.parse_known_args()[0].mongo_url
+
+if MONGO_URL:
+    os.environ["MONGO_URL"] = MONGO_URL
+else:
+    # The stand-in is far slower than Mongo at $in lookups; measure searches to completion
+    os.environ.setdefault("SEARCH_COLLECTION_TIMEOUT", "60")
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_FIRST_TOKEN_DELAY", "0")
+os.environ.setdefault("FAKE_LLM_TOKEN_DELAY", "0")
+os.environ.setdefault("MEDIA_ROOT", tempfile.mkdtemp(prefix="bench-media-"))
+os.environ.setdefault("CHAT_WRITE_INTERVAL", "0.05")
+# The bench drives a handful of sessions from one client far above human rates
+os.environ.setdefault("CHAT_SESSION_RATE", "0")
+os.environ.setdefault("ITINERARY_CLIENT_RATE", "0")
+
+import logging  # noqa: E402
+
+import httpx  # noqa: E402
+import motor.motor_asyncio  # noqa: E402
+from mongomock_motor import AsyncMongoMockClient  # noqa: E402
+
+if not MONGO_URL:
+    # Every module-level handle in server.py binds to the stand-in
+    motor.motor_asyncio.AsyncIOMotorClient = AsyncMongoMockClient
+
+import server  # noqa: E402
+from codec import to_mongo  # noqa: E402
+
+
+BASELINE_PATH = Path(__file__).parent / "bench_baseline.json"
+MONGOD_BASELINE_PATH = Path(__file__).parent / "bench_baseline.mongod.json"
+DEFAULT_SIZES = [1000, 10000]
+
+LOCATIONS = ["Ranchi", "Palamu", "Hazaribagh", "Deoghar", "Jamshedpur", "Dhanbad", "Netarhat", "Giridih"]
+CATEGORIES = ["eco", "cultural", "adventure", "festivals"]
+EVENT_CATEGORIES = ["festival", "fair", "cultural"]
+WORDS = ["waterfall", "forest", "tribal", "temple", "lake", "hill", "dance", "craft", "wildlife", "festival",
+         "trek", "museum", "dam", "valley", "sunrise", "heritage", "village", "river", "garden", "fort"]
+SEARCH_QUERIES = ["waterfall", "tribal craft", "Ranchi lake", "wildlife forest", "fest", "heritage museum",
+                  "hill sunrise", "Netarhat"]
+INTERESTS = [["eco"], ["culture"], ["adventure", "eco"], ["festival"], ["wildlife", "heritage"]]
+
+
+def _text(rng: random.Random, n: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def synthetic_catalog(size: int, seed: int = 7):
+    rng = random.Random(seed)
+    destinations, events, guides = [], [], []
+    for i in range(size):
+        location = rng.choice(LOCATIONS)
+        destinations.append(server.Destination(
+            name=f"{_text(rng, 2).title()} {i}", description=_text(rng, 20), location=location,
+            category=rng.choice(CATEGORIES), images=[f"/images/d{i}.png"],
+            latitude=rng.uniform(22.0, 25.3), longitude=rng.uniform(83.3, 87.9),
+            best_time_to_visit="October to March", cultural_significance=_text(rng, 8)
+        ))
+        events.append(server.Event(
+            name=f"{_text(rng, 2).title()} Mela {i}", description=_text(rng, 20), location=location,
+            date=f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            category=rng.choice(EVENT_CATEGORIES)
+        ))
+        guides.append(server.LocalGuide(
+            name=f"Guide {i}", specialization=_text(rng, 3).title(), location=location,
+            contact=f"+91-90000{i:05d}", rating=round(rng.uniform(3.0, 5.0), 1),
+            description=_text(rng, 15), price_per_day=f"₹{rng.randint(10, 40) * 100}"
+        ))
+    return destinations, events, guides
+
+
+async def seed(size: int, batch: int = 5000):
+    db = server.db
+    for collection in (db.destinations, db.events, db.guides, db.chat_messages, db.chat_sessions, db.itineraries):
+        await collection.delete_many({})
+    # Startup already built them; seeding runs with the same unique indexes as production
+    await server.ensure_indexes(db)
+    for collection, objs in zip((db.destinations, db.events, db.guides), synthetic_catalog(size)):
+        for start in range(0, len(objs), batch):
+            await collection.insert_many([to_mongo(obj) for obj in objs[start:start + batch]])
+    await server.rebuild_search_index()
+    await server.catalog_changed("destinations", "events", "guides", indexed=True)
+    server.chat_contexts._cache.clear()
+
+
+def scenarios(rng: random.Random):
+    """Route name -> callable returning (method, path, json body) for the next request."""
+    counter = iter(range(10 ** 9))
+    return {
+        "GET /destinations": lambda: ("GET", f"/api/destinations?limit=100&category={rng.choice(CATEGORIES)}", None),
+        "GET /events": lambda: ("GET", f"/api/events?limit=100&category={rng.choice(EVENT_CATEGORIES)}", None),
+        "GET /guides": lambda: ("GET", f"/api/guides?limit=100&location={rng.choice(LOCATIONS)}", None),
+        "GET /destinations (cold)": lambda: ("GET", f"/api/destinations?limit=100&category={rng.choice(CATEGORIES)}", None),
+        "GET /events (cold)": lambda: ("GET", f"/api/events?limit=100&category={rng.choice(EVENT_CATEGORIES)}", None),
+        "GET /guides (cold)": lambda: ("GET", f"/api/guides?limit=100&location={rng.choice(LOCATIONS)}", None),
+        "POST /search": lambda: ("POST", "/api/search", {"query": rng.choice(SEARCH_QUERIES)}),
+        # Unique questions, so every request reaches the (fake) model
+        "POST /chat": lambda: ("POST", "/api/chat", {
+            "session_id": f"bench-{rng.randint(0, 50)}", "message": f"Tell me about {_text(rng, 3)} #{next(counter)}"
+        }),
+        "POST /itinerary/generate": lambda: ("POST", "/api/itinerary/generate", {
+            "user_name": "bench", "days": rng.randint(1, 5), "interests": rng.choice(INTERESTS),
+            "budget": f"₹{rng.randint(5, 50) * 1000}"
+        }),
+    }
+
+
+# Cold routes -> catalog namespace invalidated (untimed) before each request
+COLD_NAMESPACES = {
+    "GET /destinations (cold)": "destinations",
+    "GET /events (cold)": "events",
+    "GET /guides (cold)": "guides",
+}
+
+
+def percentile(sorted_values, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+async def run_route(client: httpx.AsyncClient, make_request, requests: int, concurrency: int, warmup: int,
+                    cold: str = None):
+    for _ in range(warmup):
+        method, path, body = make_request()
+        await client.request(method, path, json=body)
+
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, path, body = make_request()
+            if cold:
+                await server.catalog_cache.invalidate(cold)
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400 or (path == "/api/search" and response.json().get("partial")):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+def summarize(latencies, elapsed: float, errors: int = 0):
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "rps": round(len(latencies) / elapsed, 1),
+        "errors": errors,
+    }
+
+
+async def run_search_phases(rng: random.Random, requests: int):
+    """Time /search's two stages one query at a time: the index lookup, then the ``$in`` hydration."""
+    index_times, fetch_times = [], []
+    for _ in range(requests):
+        started = time.perf_counter()
+        hits = server.search_index.search(rng.choice(SEARCH_QUERIES), limit=server.SEARCH_RESULT_LIMIT)
+        index_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        await asyncio.gather(*(server.fetch_ranked(collection, ids) for collection, ids in hits.items()))
+        fetch_times.append(time.perf_counter() - started)
+    return {
+        "POST /search (index)": summarize(index_times, sum(index_times)),
+        "POST /search (hydration)": summarize(fetch_times, sum(fetch_times)),
+    }
+
+
+async def run(sizes, requests: int, concurrency: int, warmup: int, routes=None, seed_value: int = 7):
+    results = {}
+    await server.app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for size in sizes:
+                started = time.perf_counter()
+                await seed(size)
+                print(f"\nSeeded {size} documents per collection in {time.perf_counter() - started:.1f}s")
+                rng = random.Random(seed_value)
+                measured = {}
+                for route, make_request in scenarios(rng).items():
+                    if routes and route not in routes:
+                        continue
+                    measured[route] = await run_route(client, make_request, requests, concurrency, warmup,
+                                                      COLD_NAMESPACES.get(route))
+                    if route == "POST /search":
+                        measured.update(await run_search_phases(rng, requests))
+                for route, result in measured.items():
+                    results[f"{size}:{route}"] = result
+                    print(f"  {route:<26} p50 {result['p50_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  "
+                          f"{result['rps']:8.1f} req/s" + (f"  {result['errors']} errors" if result["errors"] else ""))
+    finally:
+        await server.app.router.shutdown()
+    return results
+
+
+def compare(results, baseline, tolerance: float):
+    """Print deltas against ``baseline``; returns the keys that regressed beyond ``tolerance``."""
+    regressions = []
+    print(f"\nAgainst baseline (tolerance {tolerance:.0%}):")
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"  {key:<34} no baseline")
+            continue
+        p99_delta = result["p99_ms"] / base["p99_ms"] - 1 if base["p99_ms"] else 0.0
+        rps_delta = result["rps"] / base["rps"] - 1 if base["rps"] else 0.0
+        regressed = p99_delta > tolerance or rps_delta < -tolerance
+        print(f"  {key:<34} p99 {p99_delta:+7.1%}  req/s {rps_delta:+7.1%}" + ("  REGRESSED" if regressed else ""))
+        if regressed:
+            regressions.append(key)
+    return regressions
+
+
+def main():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--route", action="append", dest="routes", help="only run this route (repeatable)")
+    parser.add_argument("--mongo-url", help="benchmark against this mongod instead of mongomock (wipes DB_NAME)")
+    parser.add_argument("--baseline", type=Path, default=MONGOD_BASELINE_PATH if MONGO_URL else BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--check", action="store_true", help="exit 1 if any route regressed")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.sizes, args.requests, args.concurrency, args.warmup, args.routes))
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    if args.baseline.exists():
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions and args.check:
+            raise SystemExit(1)
+    else:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Per-document decode cost: legacy parse_from_mongo vs the schema-driven codec.
+
+    python bench_codec.py [--docs 10000] [--repeat 5]
+
+No database is needed; documents are synthesized in the shape Mongo returns.
+"""
+import argparse
+import copy
+import os
+import timeit
+from datetime import datetime, timezone
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench")
+
+from codec import codec_for, from_mongo  # noqa: E402
+from server import Destination, SAMPLE_DESTINATIONS  # noqa: E402
+
+
+# The helper server.py used before the codec, kept verbatim as the baseline
+def legacy_parse_from_mongo(item):
+    if isinstance(item, dict):
+        for key, value in item.items():
+            if isinstance(value, str) and 'T' in value:
+                try:
+                    item[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                except:
+                    pass
+    return item
+
+
+def make_docs(n, native_dates):
+    docs = []
+    for i in range(n):
+        doc = Destination(**SAMPLE_DESTINATIONS[i % len(SAMPLE_DESTINATIONS)]).dict()
+        doc["_id"] = i
+        doc["created_at"] = datetime.now(timezone.utc) if native_dates else doc["created_at"].isoformat()
+        docs.append(doc)
+    return docs
+
+
+def per_doc_us(fn, docs, repeat):
+    batches = [copy.deepcopy(docs) for _ in range(repeat)]
+    best = min(timeit.timeit(lambda: [fn(d) for d in batches.pop()], number=1) for _ in range(repeat))
+    return best / len(docs) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    legacy_docs = make_docs(args.docs, native_dates=False)
+    native_docs = make_docs(args.docs, native_dates=True)
+    codec = codec_for(Destination)
+
+    rows = [
+        ("legacy parse_from_mongo", per_doc_us(legacy_parse_from_mongo, legacy_docs, args.repeat)),
+        ("codec.decode (ISO strings)", per_doc_us(codec.decode, legacy_docs, args.repeat)),
+        ("codec.decode (BSON dates)", per_doc_us(codec.decode, native_docs, args.repeat)),
+        ("legacy parse + Destination", per_doc_us(
+            lambda d: Destination(**legacy_parse_from_mongo(d)), legacy_docs, args.repeat)),
+        ("from_mongo (BSON dates)", per_doc_us(
+            lambda d: from_mongo(Destination, d), native_docs, args.repeat)),
+    ]
+
+    print(f"{args.docs} documents, best of {args.repeat}")
+    for name, cost in rows:
+        print(f"  {name:<30} {cost:8.2f} us/doc")
+
+
+if __name__ == "__main__":
+    main()
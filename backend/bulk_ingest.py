@@ -0,0 +1,174 @@
+import inspect
+import json
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from codec import codec_for, to_mongo
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class BulkPayloadError(ValueError):
+    pass
+
+
+async def iter_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Parse newline-delimited JSON off a byte stream; bad lines come back as exceptions."""
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_line(line)
+    if buffer.strip():
+        yield _parse_line(buffer)
+
+
+def _parse_line(line: bytes):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+async def iter_request_items(request) -> AsyncIterator[Any]:
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NDJSON_TYPES:
+        async for item in iter_ndjson(request.stream()):
+            yield item
+        return
+
+    try:
+        payload = await request.json()
+    except ValueError as e:
+        raise BulkPayloadError(f"Invalid JSON body: {e}")
+    if not isinstance(payload, list):
+        raise BulkPayloadError("Expected a JSON array or an NDJSON stream")
+    for item in payload:
+        yield item
+
+
+def upsert_op(doc: dict, derived_fields: Tuple[str, ...] = ()) -> UpdateOne:
+    """Upsert on ``id``, keeping the stored ``created_at``.
+
+    Derived fields the new document no longer has (e.g. ``geo`` once the
+    coordinates are gone) are unset rather than left stale.
+    """
+    created_at = doc.pop("created_at", None)
+    stale = {name: "" for name in derived_fields if doc.get(name) is None}
+    for name in stale:
+        doc.pop(name, None)
+    update: Dict[str, Any] = {"$set": doc}
+    if created_at is not None:
+        update["$setOnInsert"] = {"created_at": created_at}
+    if stale:
+        update["$unset"] = stale
+    return UpdateOne({"id": doc["id"]}, update, upsert=True)
+
+
+class BulkReport:
+    def __init__(self):
+        self.received = 0
+        self.upserted = 0
+        self.modified = 0
+        self.matched = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, index: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"index": index, "error": message})
+
+    def dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "upserted": self.upserted,
+            "modified": self.modified,
+            "unchanged": self.matched - self.modified,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+async def _flush(collection, chunk: List[Tuple[int, BaseModel]], report: BulkReport,
+                 on_written: Optional[Callable[[List[dict]], Any]]):
+    ops = [upsert_op(to_mongo(obj), codec_for(type(obj)).derived_fields) for _, obj in chunk]
+    failed_positions = set()
+    try:
+        result = await collection.bulk_write(ops, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for write_error in details.get("writeErrors", []):
+            position = write_error["index"]
+            failed_positions.add(position)
+            report.error(chunk[position][0], write_error.get("errmsg", "write failed"))
+
+    report.upserted += details.get("nUpserted", 0)
+    report.modified += details.get("nModified", 0)
+    report.matched += details.get("nMatched", 0)
+
+    if on_written:
+        written = on_written([obj.dict() for position, (_, obj) in enumerate(chunk) if position not in failed_positions])
+        if inspect.isawaitable(written):
+            await written
+
+
+async def ingest(collection, model: Type[BaseModel], items: AsyncIterator[Any],
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 on_written: Optional[Callable[[List[dict]], Any]] = None,
+                 prepare: Optional[Callable[[BaseModel], Any]] = None) -> Dict[str, Any]:
+    """Validate ``items`` against ``model`` and upsert them on ``id`` in unordered chunks.
+
+    ``prepare`` may fill derived fields on each validated object before it is written;
+    a ValueError from it rejects that item.
+    ``on_written`` receives the documents of each chunk that landed; either may be async.
+    Invalid items and per-document write failures are reported by their
+    position in the input; they never abort the rest of the batch.
+    """
+    report = BulkReport()
+    chunk: List[Tuple[int, BaseModel]] = []
+    async for item in items:
+        index = report.received
+        report.received += 1
+        if isinstance(item, Exception):
+            report.error(index, f"Invalid JSON: {item}")
+            continue
+        if not isinstance(item, dict):
+            report.error(index, "Expected a JSON object")
+            continue
+        try:
+            obj = model(**item)
+        except ValidationError as e:
+            report.error(index, str(e))
+            continue
+        if prepare:
+            try:
+                prepared = prepare(obj)
+                if inspect.isawaitable(prepared):
+                    await prepared
+            except ValueError as e:
+                report.error(index, str(e))
+                continue
+        chunk.append((index, obj))
+        if len(chunk) >= chunk_size:
+            await _flush(collection, chunk, report, on_written)
+            chunk = []
+    if chunk:
+        await _flush(collection, chunk, report, on_written)
+
+    logger.info("Bulk ingest into %s: %d received, %d upserted, %d failed",
+                collection.name, report.received, report.upserted, report.failed)
+    return report.dict()
@@ -0,0 +1,143 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryBackend:
+    """Process-local TTL + LRU store bounded by entry count."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        # Versions start from the boot time so they (and ETags built from them)
+        # never repeat across restarts
+        self._base_version = int(time.time() * 1000)
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def version(self, namespace: str) -> int:
+        return self._versions.get(namespace, self._base_version)
+
+    async def bump(self, namespace: str) -> int:
+        self._versions[namespace] = self._versions.get(namespace, self._base_version) + 1
+        # Entries under the old version are unreachable now; drop them eagerly
+        prefix = f"{namespace}:"
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            del self._entries[key]
+        return self._versions[namespace]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared store for multi-worker deployments.
+
+    Accepts any client with the async ``get``/``set(ex=)``/``incr`` subset of
+    redis-py, so tests can hand in a stub. Values are stored as JSON, and
+    invalidation bumps a shared per-namespace version that every worker reads.
+    """
+
+    def __init__(self, client, prefix: str = "catalog"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str):
+        raw = await self.client.get(f"{self.prefix}:{key}")
+        return None if raw is None else json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self.client.set(f"{self.prefix}:{key}", json.dumps(value), ex=max(1, int(ttl)))
+
+    async def version(self, namespace: str) -> int:
+        raw = await self.client.get(f"{self.prefix}:version:{namespace}")
+        return int(raw or 0)
+
+    async def bump(self, namespace: str) -> int:
+        return await self.client.incr(f"{self.prefix}:version:{namespace}")
+
+
+class CatalogCache:
+    """Read-through cache for catalog reads, invalidated per namespace on writes."""
+
+    def __init__(self, backend, ttl: float = 300.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def version(self, namespace: str) -> int:
+        return await self.backend.version(namespace)
+
+    async def get_or_load(self, namespace: str, key: str, loader: Callable[[], Awaitable[Any]],
+                          version: Optional[int] = None):
+        if version is None:
+            version = await self.backend.version(namespace)
+        full_key = f"{namespace}:{version}:{key}"
+        value = await self.backend.get(full_key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = await loader()
+        # A write that lands while we were loading bumps the version, so this
+        # entry is written under a key nobody reads any more.
+        if value is not None:
+            await self.backend.set(full_key, value, self.ttl)
+        return value
+
+    async def invalidate(self, *namespaces: str) -> Dict[str, int]:
+        """Bump each namespace; returns the new versions."""
+        versions = {}
+        for namespace in namespaces:
+            versions[namespace] = await self.backend.bump(namespace)
+            self.invalidations += 1
+        return versions
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+def cache_key(route: str, **params) -> str:
+    parts = [f"{name}={params[name]}" for name in sorted(params) if params[name] is not None]
+    return "|".join([route, *parts])
+
+
+def create_backend(kind: str, max_entries: int, redis_url: Optional[str] = None):
+    if kind == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            logger.warning("redis package not installed; falling back to the in-memory catalog cache")
+        else:
+            return RedisBackend(redis.from_url(redis_url or "redis://localhost:6379/0"))
+    return InMemoryBackend(max_entries=max_entries)
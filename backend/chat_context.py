@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Turn = Tuple[str, str]  # (user message, assistant reply)
+
+SUMMARY_MAX_CHARS = 1500
+TURN_MAX_CHARS = 600
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def fold_summary(summary: str, turns: List[Turn], max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """Extractive rolling summary: the questions asked so far, oldest dropped first."""
+    topics = [_clip(user, 120) for user, _ in turns if user.strip()]
+    if not topics:
+        return summary
+    addition = "The user asked about: " + "; ".join(topics) + "."
+    combined = f"{summary} {addition}".strip() if summary else addition
+    return combined if len(combined) <= max_chars else "…" + combined[-(max_chars - 1):]
+
+
+def format_context(summary: str, turns: List[Turn]) -> str:
+    parts = []
+    if summary:
+        parts.append(f"Summary of the earlier conversation: {summary}")
+    if turns:
+        lines = []
+        for user, assistant in turns:
+            lines.append(f"User: {_clip(user, TURN_MAX_CHARS)}")
+            lines.append(f"Assistant: {_clip(assistant, TURN_MAX_CHARS)}")
+        parts.append("Most recent exchanges:\n" + "\n".join(lines))
+    return "\n\n".join(parts)
+
+
+class _Session:
+    __slots__ = ("summary", "turns", "overflow", "summarizing")
+
+    def __init__(self, summary: str, turns: List[Turn], window: int):
+        self.summary = summary
+        self.turns: Deque[Turn] = deque(turns, maxlen=window)
+        self.overflow: List[Turn] = []
+        self.summarizing = False
+
+
+class ChatContextStore:
+    """Per-session LLM context: the last ``window`` turns plus a rolling summary.
+
+    Turns that slide out of the window are folded into the summary, which is
+    stored in ``sessions`` so it survives restarts. Recent turns are kept in
+    memory and reloaded from ``messages`` for sessions not seen yet, after
+    awaiting ``before_load(session_id)`` (e.g. flushing that session's
+    buffered message writes).
+    """
+
+    def __init__(self, sessions, messages, window: int = 6, max_sessions: int = 10000,
+                 summarizer: Optional[Callable[[str, List[Turn]], Awaitable[str]]] = None,
+                 before_load: Optional[Callable[[str], Awaitable[Any]]] = None):
+        self.sessions = sessions
+        self.messages = messages
+        self.window = window
+        self.max_sessions = max_sessions
+        self.summarizer = summarizer
+        self.before_load = before_load
+        self._cache: "OrderedDict[str, _Session]" = OrderedDict()
+        self._tasks = set()
+        self.loads = 0
+        self.summaries = 0
+
+    async def _session(self, session_id: str) -> _Session:
+        session = self._cache.get(session_id)
+        if session is None:
+            if self.before_load is not None:
+                await self.before_load(session_id)
+            stored = await self.sessions.find_one({"session_id": session_id}, {"_id": 0, "summary": 1})
+            recent = await self.messages.find(
+                {"session_id": session_id}, {"_id": 0, "user_message": 1, "bot_response": 1}
+            ).sort([("timestamp", -1), ("id", -1)]).limit(self.window).to_list(self.window)
+            turns = [(m["user_message"], m["bot_response"]) for m in reversed(recent)]
+            session = self._cache[session_id] = _Session((stored or {}).get("summary", ""), turns, self.window)
+            self.loads += 1
+            while len(self._cache) > self.max_sessions:
+                self._cache.popitem(last=False)
+        self._cache.move_to_end(session_id)
+        return session
+
+    async def context(self, session_id: str) -> str:
+        """Context text for a new client on this session."""
+        session = await self._session(session_id)
+        return format_context(session.summary, list(session.turns))
+
+    async def has_history(self, session_id: str) -> bool:
+        """Whether the session already has turns or a summary to answer from."""
+        session = await self._session(session_id)
+        return bool(session.turns or session.summary)
+
+    async def record(self, session_id: str, user: str, assistant: str):
+        session = await self._session(session_id)
+        if len(session.turns) == session.turns.maxlen:
+            session.overflow.append(session.turns[0])
+        session.turns.append((user, assistant))
+        if len(session.overflow) >= self.window and not session.summarizing:
+            # Summaries are written off the request path
+            session.summarizing = True
+            task = asyncio.ensure_future(self._summarize(session_id, session))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _summarize(self, session_id: str, session: _Session):
+        folded, session.overflow = session.overflow, []
+        try:
+            summary = fold_summary(session.summary, folded)
+            if self.summarizer is not None:
+                try:
+                    summary = await self.summarizer(session.summary, folded) or summary
+                except Exception as e:
+                    logger.warning("Chat summary for %s fell back to extractive: %s", session_id, e)
+            session.summary = summary
+            await self.sessions.update_one(
+                {"session_id": session_id},
+                {"$set": {"summary": summary, "updated_at": datetime.now(timezone.utc)},
+                 "$inc": {"turns_summarized": len(folded)}},
+                upsert=True
+            )
+            self.summaries += 1
+        except Exception as e:
+            logger.error("Storing chat summary for %s failed: %s", session_id, e)
+        finally:
+            session.summarizing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._cache),
+            "window": self.window,
+            "loads": self.loads,
+            "summaries": self.summaries,
+        }
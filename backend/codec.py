@@ -0,0 +1,107 @@
+import logging
+import typing
+from datetime import datetime, timezone
+from typing import Dict, Tuple, Type
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+def _is_datetime(annotation) -> bool:
+    if annotation is datetime:
+        return True
+    # Optional[datetime] and friends
+    return any(_is_datetime(arg) for arg in typing.get_args(annotation))
+
+
+def _as_utc(value):
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, str):
+        # Documents written before dates were stored natively hold ISO strings
+        try:
+            return _as_utc(datetime.fromisoformat(value.replace("Z", "+00:00")))
+        except ValueError:
+            return value
+    return value
+
+
+class ModelCodec:
+    """Converts one model to and from its Mongo document.
+
+    The datetime fields are resolved once from the model's annotations, so
+    decoding only touches those keys instead of probing every string.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.datetime_fields: Tuple[str, ...] = tuple(
+            name for name, field in model.model_fields.items() if _is_datetime(field.annotation)
+        )
+        self.geo = "latitude" in model.model_fields and "longitude" in model.model_fields
+        # Stored alongside the model's own fields and left out when they do not apply
+        self.derived_fields: Tuple[str, ...] = ("geo",) if self.geo else ()
+
+    def encode(self, obj: BaseModel) -> dict:
+        # pymongo stores datetime values as native BSON dates
+        doc = obj.dict()
+        if self.geo and doc.get("latitude") is not None and doc.get("longitude") is not None:
+            # GeoJSON mirror of the coordinates for the 2dsphere index
+            doc["geo"] = {"type": "Point", "coordinates": [doc["longitude"], doc["latitude"]]}
+        return doc
+
+    def decode(self, doc: dict) -> dict:
+        if self.geo:
+            doc.pop("geo", None)
+        for name in self.datetime_fields:
+            value = doc.get(name)
+            if value is not None:
+                doc[name] = _as_utc(value)
+        return doc
+
+    def load(self, doc: dict) -> BaseModel:
+        return self.model(**self.decode(doc))
+
+
+_codecs: Dict[Type[BaseModel], ModelCodec] = {}
+
+
+def codec_for(model: Type[BaseModel]) -> ModelCodec:
+    codec = _codecs.get(model)
+    if codec is None:
+        codec = _codecs[model] = ModelCodec(model)
+    return codec
+
+
+def to_mongo(obj: BaseModel) -> dict:
+    return codec_for(type(obj)).encode(obj)
+
+
+def from_mongo(model: Type[BaseModel], doc: dict) -> BaseModel:
+    return codec_for(model).load(doc)
+
+
+async def migrate_datetime_fields(collection, model: Type[BaseModel]) -> int:
+    """Rewrite legacy ISO-string datetimes in ``collection`` as BSON dates, server side."""
+    migrated = 0
+    for name in codec_for(model).datetime_fields:
+        result = await collection.update_many(
+            {name: {"$type": "string"}},
+            [{"$set": {name: {"$toDate": f"${name}"}}}]
+        )
+        migrated += result.modified_count
+    if migrated:
+        logger.info("Converted %d string datetimes to BSON dates in %s", migrated, collection.name)
+    return migrated
+
+
+async def backfill_geo(collection) -> int:
+    """Add the GeoJSON ``geo`` point to documents that have coordinates but predate it."""
+    result = await collection.update_many(
+        {"geo": {"$exists": False}, "latitude": {"$type": "number"}, "longitude": {"$type": "number"}},
+        [{"$set": {"geo": {"type": "Point", "coordinates": ["$longitude", "$latitude"]}}}]
+    )
+    if result.modified_count:
+        logger.info("Added geo points to %d documents in %s", result.modified_count, collection.name)
+    return result.modified_count
@@ -0,0 +1,113 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, GEOSPHERE, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Every index the API relies on, per collection. Keep this in step with the
+# query shapes in server.QUERY_SHAPES so /api/admin/query-plans stays clean.
+# List routes page on (created_at, id), so filters lead into that suffix.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "destinations": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_id"),
+        IndexModel([("category", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+                   name="category_created_id"),
+        IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+    ],
+    "events": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_id"),
+        IndexModel([("category", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+                   name="category_created_id"),
+        IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+    ],
+    "guides": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_id"),
+        IndexModel([("location", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)],
+                   name="location_created_id"),
+        # Equality, then the sort key, which also bounds the rating / price range;
+        # the other price bound and availability filter the fetched documents
+        IndexModel([("rating", ASCENDING), ("id", ASCENDING)], name="rating_id"),
+        IndexModel([("location", ASCENDING), ("rating", ASCENDING), ("id", ASCENDING)],
+                   name="location_rating_id"),
+        IndexModel([("price_min", ASCENDING), ("id", ASCENDING)], name="price_min_id"),
+        IndexModel([("location", ASCENDING), ("price_min", ASCENDING), ("id", ASCENDING)],
+                   name="location_price_min_id"),
+        # Multikey; one array field per index, so availability cannot join it
+        IndexModel([("languages", ASCENDING), ("rating", ASCENDING), ("id", ASCENDING)],
+                   name="languages_rating_id"),
+        IndexModel([("geo", GEOSPHERE)], name="geo_2dsphere"),
+    ],
+    "event_occurrences": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("event_id", ASCENDING)], name="event_id"),
+        # Date ranges: start is bounded on both sides (see event_calendar.MAX_EVENT_DAYS)
+        IndexModel([("start", ASCENDING), ("id", ASCENDING)], name="start_id"),
+        IndexModel([("category", ASCENDING), ("start", ASCENDING), ("id", ASCENDING)],
+                   name="category_start_id"),
+        IndexModel([("months", ASCENDING), ("start", ASCENDING), ("id", ASCENDING)],
+                   name="months_start_id"),
+    ],
+    "itineraries": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_id"),
+    ],
+    "chat_messages": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("session_id", ASCENDING), ("timestamp", ASCENDING), ("id", ASCENDING)],
+                   name="session_timestamp_id"),
+    ],
+    "chat_sessions": [
+        IndexModel([("session_id", ASCENDING)], name="session_id_unique", unique=True),
+    ],
+}
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create any missing indexes. Failures are logged per collection, never raised."""
+    created = {}
+    for collection, models in INDEXES.items():
+        try:
+            created[collection] = await db[collection].create_indexes(models)
+        except PyMongoError as e:
+            logger.error("Failed to ensure indexes on %s: %s", collection, e)
+            created[collection] = []
+    return created
+
+
+def _plan_stages(plan: Dict[str, Any]) -> List[str]:
+    stages = []
+    pending = [plan]
+    while pending:
+        node = pending.pop()
+        if not isinstance(node, dict):
+            continue
+        if "stage" in node:
+            stages.append(node["stage"])
+        if "inputStage" in node:
+            pending.append(node["inputStage"])
+        pending.extend(node.get("inputStages", []))
+        if "queryPlan" in node:
+            pending.append(node["queryPlan"])
+    return stages
+
+
+def summarize_plan(explain: Dict[str, Any]) -> Dict[str, Any]:
+    winning = explain.get("queryPlanner", {}).get("winningPlan", {})
+    stages = _plan_stages(winning)
+    return {
+        "stages": stages,
+        "collscan": "COLLSCAN" in stages,
+    }
+
+
+async def explain_query(db, collection: str, query: Dict[str, Any],
+                        sort: Optional[List[Tuple[str, int]]] = None) -> Dict[str, Any]:
+    cursor = db[collection].find(query)
+    if sort:
+        cursor = cursor.sort(sort)
+    return summarize_plan(await cursor.explain())
@@ -0,0 +1,119 @@
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import DeleteMany, ReplaceOne
+
+# Longest single occurrence; range queries rely on it to bound the index scan on start
+MAX_EVENT_DAYS = 62
+RECURRENCES = ("yearly",)
+
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def day_start(value) -> datetime:
+    """Midnight UTC of a date, datetime or ``YYYY-MM-DD`` string; events are stored at day resolution."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        value = value.date()
+    return datetime(value.year, value.month, value.day, tzinfo=timezone.utc)
+
+
+def day_string(value) -> str:
+    return day_start(value).date().isoformat()
+
+
+def parse_event_dates(text: Optional[str]) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """``"2025-10-15"`` or ``"2025-10-15 to 2025-10-19"`` -> first and last day; no date -> ``(None, None)``."""
+    days = []
+    for match in _ISO_DATE_RE.findall(text or ""):
+        try:
+            days.append(day_start(match))
+        except ValueError:
+            continue
+    if not days:
+        return None, None
+    return min(days), max(days)
+
+
+def _in_year(day: datetime, year: int) -> datetime:
+    # 29 February falls back to the 28th in common years
+    try:
+        return day.replace(year=year)
+    except ValueError:
+        return day.replace(year=year, day=28)
+
+
+def expand_occurrences(start: datetime, end: datetime, recurrence: Optional[str],
+                       until_year: int, extra_starts: Iterable = ()) -> List[Tuple[datetime, datetime]]:
+    """Every (start, end) of an event, in order.
+
+    Yearly events repeat on the same Gregorian dates through ``until_year``;
+    ``extra_starts`` are further first days given explicitly (lunar festivals),
+    each lasting as long as the first occurrence.
+    """
+    span = end - start
+    starts = {start} | {day_start(day) for day in extra_starts}
+    if recurrence == "yearly":
+        starts.update(_in_year(start, year) for year in range(start.year, until_year + 1))
+    return [(first, first + span) for first in sorted(starts)]
+
+
+def month_keys(start: datetime, end: datetime) -> List[str]:
+    """``YYYY-MM`` of every month the span touches."""
+    keys = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        keys.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return keys
+
+
+def occurrence_docs(event: Dict[str, Any], until_year: int) -> List[Dict[str, Any]]:
+    """Calendar rows for one event, with enough of the event copied in to render a month."""
+    if event.get("start_date") is None:
+        return []
+    start, end = day_start(event["start_date"]), day_start(event.get("end_date") or event["start_date"])
+    recurrence, extra_starts = event.get("recurrence"), event.get("occurrences") or []
+    return [{
+        "id": f"{event['id']}:{first.date().isoformat()}",
+        "event_id": event["id"],
+        "name": event["name"],
+        "location": event["location"],
+        "category": event["category"],
+        "start": first,
+        "end": last,
+        "months": month_keys(first, last),
+        "recurring": recurrence is not None or bool(extra_starts),
+    } for first, last in expand_occurrences(start, end, recurrence, until_year, extra_starts)]
+
+
+async def sync_occurrences(collection, events: Iterable[Dict[str, Any]], until_year: int) -> int:
+    """Rewrite the calendar rows of ``events``; rows for dates an event no longer has are removed."""
+    ops = []
+    for event in events:
+        docs = occurrence_docs(event, until_year)
+        ops.append(DeleteMany({"event_id": event["id"], "id": {"$nin": [doc["id"] for doc in docs]}}))
+        ops.extend(ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in docs)
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+    return len(ops)
+
+
+def occurrence_query(start: Optional[datetime] = None, end: Optional[datetime] = None,
+                     category: Optional[str] = None) -> Dict[str, Any]:
+    """Rows overlapping ``start``..``end`` (inclusive days, either side open)."""
+    query: Dict[str, Any] = {}
+    if category:
+        query["category"] = category
+    if start is not None:
+        # Nothing that began more than MAX_EVENT_DAYS earlier can still be running,
+        # which keeps the scan on the start index bounded on both sides
+        query["start"] = {"$gte": start - timedelta(days=MAX_EVENT_DAYS)}
+        query["end"] = {"$gte": start}
+    if end is not None:
+        query.setdefault("start", {})["$lte"] = end
+    return query
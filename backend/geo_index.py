@@ -0,0 +1,87 @@
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from planner import EARTH_RADIUS_KM
+
+KM_PER_DEGREE = 111.32
+
+
+class GridIndex:
+    """In-memory fixed-grid point index per collection, for radius queries.
+
+    Used when the database cannot answer $geoNear (the embedded test
+    database) and kept in sync the same way as the search index.
+    """
+
+    def __init__(self, cell_degrees: float = 0.25):
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[str, Dict[Tuple[int, int], Dict[str, Tuple[float, float, Optional[str]]]]] = \
+            defaultdict(lambda: defaultdict(dict))
+        self._points: Dict[str, Dict[str, Tuple[int, int]]] = defaultdict(dict)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def __len__(self):
+        return sum(len(points) for points in self._points.values())
+
+    def add(self, collection: str, doc: dict):
+        self.remove(collection, doc["id"])
+        lat, lng = doc.get("latitude"), doc.get("longitude")
+        if lat is None or lng is None:
+            return
+        cell = self._cell(lat, lng)
+        self._cells[collection][cell][doc["id"]] = (lat, lng, doc.get("category"))
+        self._points[collection][doc["id"]] = cell
+
+    def add_many(self, collection: str, docs: Iterable[dict]):
+        for doc in docs:
+            self.add(collection, doc)
+
+    def remove(self, collection: str, doc_id: str):
+        cell = self._points[collection].pop(doc_id, None)
+        if cell is not None:
+            bucket = self._cells[collection][cell]
+            bucket.pop(doc_id, None)
+            if not bucket:
+                del self._cells[collection][cell]
+
+    def clear(self, collection: str):
+        self._cells.pop(collection, None)
+        self._points.pop(collection, None)
+
+    def nearby(self, collection: str, lat: float, lng: float, radius_km: float,
+               limit: int, category: Optional[str] = None) -> List[Tuple[float, str]]:
+        """Return up to ``limit`` ``(distance_km, id)`` pairs within ``radius_km``, nearest first."""
+        cells = self._cells.get(collection)
+        if not cells:
+            return []
+
+        dlat = radius_km / KM_PER_DEGREE
+        dlng = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        lat_lo, lng_lo = self._cell(lat - dlat, lng - dlng)
+        lat_hi, lng_hi = self._cell(lat + dlat, lng + dlng)
+
+        ids, lats, lngs = [], [], []
+        for i in range(lat_lo, lat_hi + 1):
+            for j in range(lng_lo, lng_hi + 1):
+                for doc_id, (plat, plng, pcat) in cells.get((i, j), {}).items():
+                    if category and pcat != category:
+                        continue
+                    ids.append(doc_id)
+                    lats.append(plat)
+                    lngs.append(plng)
+        if not ids:
+            return []
+
+        lat1, lng1 = math.radians(lat), math.radians(lng)
+        lat2, lng2 = np.radians(lats), np.radians(lngs)
+        a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+        dist = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+        within = np.nonzero(dist <= radius_km)[0]
+        order = sorted(within, key=lambda k: (dist[k], ids[k]))[:limit]
+        return [(float(dist[k]), ids[k]) for k in order]
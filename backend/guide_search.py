@@ -0,0 +1,127 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+DAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+DAY_GROUPS = {
+    "weekdays": DAYS[:5],
+    "weekends": DAYS[5:],
+    "daily": DAYS,
+    "everyday": DAYS,
+    "all": DAYS,
+    "alldays": DAYS,
+}
+
+# Sort names accepted by GET /api/guides -> stored field; "-" prefix sorts descending
+GUIDE_SORTS = {"created_at": "created_at", "rating": "rating", "price": "price_min"}
+
+_AMOUNT = r"(\d[\d,]*(?:\.\d+)?)\s*(k\b)?"
+_CURRENCY = r"(?:₹|\brs\.?|\binr\b)"
+_RANGE_TAIL = rf"(?:\s*(?:-|–|to)\s*{_CURRENCY}?\s*{_AMOUNT})?"
+# Only amounts tied to a currency marker count, so head counts, hours and
+# day counts elsewhere in the text are not read as prices
+_PRICE_RES = (
+    re.compile(rf"{_CURRENCY}\s*{_AMOUNT}{_RANGE_TAIL}", re.I),
+    re.compile(rf"{_AMOUNT}{_RANGE_TAIL}\s*(?:inr\b|rs\b|rupees\b)", re.I),
+    # A bare amount or range with nothing else around it
+    re.compile(rf"^\s*{_AMOUNT}{_RANGE_TAIL}\s*$", re.I),
+)
+
+
+def _amount(number: str, thousands: str) -> int:
+    return int(round(float(number.replace(",", "")) * (1000 if thousands else 1)))
+
+
+def parse_price_range(text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """Daily price range in rupees, or ``(None, None)`` when the text holds no price.
+
+    ``"₹2000-3000"`` -> ``(2000, 3000)``; ``"Rs 1,500/day"`` -> ``(1500, 1500)``;
+    ``"₹2k to ₹3.5k"`` -> ``(2000, 3500)``; ``"₹1500 per day (up to 4 people)"`` -> ``(1500, 1500)``;
+    ``"₹2,500/day for 8 hrs"`` -> ``(2500, 2500)``; ``"₹3000 for 2 days"`` -> ``(3000, 3000)``.
+    """
+    amounts = []
+    for price_re in _PRICE_RES:
+        for number, thousands, upper, upper_thousands in price_re.findall(text or ""):
+            amounts.append(_amount(number, thousands))
+            if upper:
+                amounts.append(_amount(upper, upper_thousands))
+        if amounts:
+            break
+    if not amounts:
+        return None, None
+    return min(amounts), max(amounts)
+
+
+def _day(value: str) -> Optional[str]:
+    key = value.strip().casefold()
+    day = key[:3].title()
+    return day if key.isalpha() and day in DAYS else None
+
+
+def normalize_days(values: List[str]) -> List[str]:
+    """Canonical ``Mon``..``Sun`` in week order.
+
+    "Monday", "Mon-Fri" and "Weekends" are understood; anything else is kept as given.
+    """
+    days, other = set(), []
+    for value in values:
+        key = "".join(value.split()).casefold()
+        first, _, last = key.partition("-")
+        if key in DAY_GROUPS:
+            days.update(DAY_GROUPS[key])
+        elif _day(key):
+            days.add(_day(key))
+        elif _day(first) and _day(last):
+            start, end = DAYS.index(_day(first)), DAYS.index(_day(last))
+            days.update(DAYS[i % 7] for i in range(start, start + (end - start) % 7 + 1))
+        elif key and value.strip() not in other:
+            other.append(value.strip())
+    return [d for d in DAYS if d in days] + other
+
+
+def normalize_languages(values: List[str]) -> List[str]:
+    languages = []
+    for value in values:
+        language = " ".join(value.split()).title()
+        if language and language not in languages:
+            languages.append(language)
+    return languages
+
+
+def split_list(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """``"-rating"`` -> ``("rating", True)``."""
+    descending = sort.startswith("-")
+    return GUIDE_SORTS[sort.lstrip("-")], descending
+
+
+def guide_query(location: Optional[str] = None, specialization: Optional[str] = None,
+                min_price: Optional[int] = None, max_price: Optional[int] = None,
+                min_rating: Optional[float] = None, languages: Optional[List[str]] = None,
+                availability: Optional[List[str]] = None, sort_field: str = "created_at") -> Dict[str, Any]:
+    """Mongo filter for the guide listing.
+
+    A price range matches guides whose own range overlaps it. Any one of
+    ``languages`` will do; every day in ``availability`` must be covered.
+    """
+    query: Dict[str, Any] = {}
+    if location:
+        query["location"] = location
+    if specialization:
+        query["specialization"] = {"$regex": specialization, "$options": "i"}
+    if max_price is not None:
+        query["price_min"] = {"$lte": max_price}
+    if min_price is not None:
+        query["price_max"] = {"$gte": min_price}
+    if sort_field == "price_min":
+        # Keyset cursors cannot step past nulls, so unpriced guides drop out of price order
+        query.setdefault("price_min", {})["$type"] = "number"
+    if min_rating is not None:
+        query["rating"] = {"$gte": min_rating}
+    if languages:
+        query["languages"] = {"$in": normalize_languages(languages)}
+    if availability:
+        query["availability"] = {"$all": normalize_days(availability)}
+    return query
@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+MIN_COMPRESS_BYTES = 1024
+CACHE_CONTROL = "public, no-cache"
+
+
+def dumps(content: Any) -> str:
+    # Same settings as starlette's JSONResponse so cached and uncached bodies match
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+
+def make_etag(namespace: str, version: int, key: str) -> str:
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return f'"{namespace}.{version}.{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Compressed variants carry a -gzip/-br suffix inside the quotes
+    base = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        tag = candidate.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        tag = tag.strip('"')
+        if tag == base or tag.rsplit("-", 1)[0] == base:
+            return True
+    return False
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class EncodedBodies:
+    """Process-local LRU of response bodies per ETag, with compressed variants built once."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._bodies: "OrderedDict[str, Dict[str, bytes]]" = OrderedDict()
+
+    def get(self, etag: str, body: str, encoding: Optional[str]) -> bytes:
+        variants = self._bodies.get(etag)
+        if variants is None:
+            variants = self._bodies[etag] = {"identity": body.encode("utf-8")}
+            while len(self._bodies) > self.max_entries:
+                self._bodies.popitem(last=False)
+        self._bodies.move_to_end(etag)
+
+        name = encoding or "identity"
+        if name not in variants:
+            raw = variants["identity"]
+            variants[name] = brotli.compress(raw) if name == "br" else gzip.compress(raw, compresslevel=6)
+        return variants[name]
+
+
+encoded_bodies = EncodedBodies()
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL,
+                                              "Vary": "Accept-Encoding"})
+
+
+def cached_json_response(request: Request, etag: str, body: str,
+                         headers: Optional[Dict[str, str]] = None) -> Response:
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+    if len(body) < MIN_COMPRESS_BYTES:
+        encoding = None
+
+    response_headers = {"Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding", **(headers or {})}
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+        response_headers["ETag"] = f'{etag[:-1]}-{encoding}"'
+    else:
+        response_headers["ETag"] = etag
+    return Response(encoded_bodies.get(etag, body, encoding), media_type="application/json",
+                    headers=response_headers)
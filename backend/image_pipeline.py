@@ -0,0 +1,244 @@
+"""Generate the site's static images.
+
+    python image_pipeline.py                      # every image set
+    python image_pipeline.py --set destinations   # one set
+    python image_pipeline.py --fake --output-dir /tmp/images
+    python image_pipeline.py --no-variants         # skip the WebP derivative stage
+
+Prompts run through a bounded pool of async workers with retries. A manifest
+in the output directory records each file's prompt hash, so reruns only
+generate images that are missing or whose prompt changed. Responsive WebP
+variants are then rebuilt for any source that changed (see image_variants).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from dotenv import load_dotenv
+
+try:
+    from emergentintegrations.llm.openai.image_generation import OpenAIImageGeneration
+except ImportError:  # offline / test environments run against the fake generator
+    OpenAIImageGeneration = None
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+IMAGE_OUTPUT_DIR = Path(os.environ.get('IMAGE_OUTPUT_DIR', ROOT_DIR.parent / 'frontend' / 'public' / 'images'))
+IMAGE_MODEL = os.environ.get('IMAGE_MODEL', 'gpt-image-1')
+IMAGE_CONCURRENCY = int(os.environ.get('IMAGE_CONCURRENCY', '3'))
+IMAGE_MAX_ATTEMPTS = int(os.environ.get('IMAGE_MAX_ATTEMPTS', '4'))
+IMAGE_RETRY_BASE_DELAY = float(os.environ.get('IMAGE_RETRY_BASE_DELAY', '2.0'))
+MANIFEST_NAME = "manifest.json"
+
+
+@dataclass(frozen=True)
+class ImageJob:
+    filename: str
+    prompt: str
+
+
+IMAGE_SETS: Dict[str, List[ImageJob]] = {
+    "cultural": [
+        ImageJob("cultural_heritage_1.png", "Vibrant tribal festival in Jharkhand with people in colorful traditional costumes dancing around bonfire, orange flames illuminating faces, authentic Indian tribal celebration"),
+        ImageJob("cultural_heritage_2.png", "Traditional Jharkhand handicrafts display - beautiful terracotta pottery, bamboo crafts, and tribal jewelry with prominent orange and earthy colors, artisan marketplace scene"),
+        ImageJob("cultural_heritage_3.png", "Jharkhand folk art and tribal paintings on walls showing Sohrai and Khovar art forms with orange ochre pigments, traditional patterns and motifs"),
+        ImageJob("cultural_heritage_4.png", "Colorful Karma festival celebration in Jharkhand with tribal dancers in orange and red attire, traditional drums, and joyful community gathering"),
+        ImageJob("cultural_heritage_5.png", "Local artisan crafting traditional Jharkhand handicrafts - dokra metal craft and tribal textiles with rich orange and brown colors in authentic workshop setting"),
+        ImageJob("cultural_heritage_6.png", "Jharkhand tribal cultural performance with musicians playing traditional instruments, dancers in vibrant orange costumes, authentic cultural celebration scene"),
+    ],
+    "destinations": [
+        ImageJob("betla_national_park.png", "Betla National Park in Jharkhand India - lush green forest with tigers and elephants, wildlife sanctuary with dense vegetation, realistic nature photography style"),
+        ImageJob("tribal_village.png", "Traditional tribal village in Jharkhand with authentic mud houses, thatched roofs, village life, tribal people in traditional attire, rural landscape setting"),
+        ImageJob("hundru_falls_realistic.png", "Hundru Falls waterfall in Jharkhand - spectacular 98 meter waterfall cascading down rocky cliffs, surrounded by green forest, mist and natural beauty"),
+        ImageJob("jharkhand_wildlife.png", "Jharkhand wildlife scene in Betla National Park - elephants in natural habitat, dense forest background, wildlife photography style"),
+    ],
+}
+
+
+def prompt_hash(prompt: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class FakeImageGenerator:
+    """Stand-in for OpenAIImageGeneration that returns a small solid-colour PNG per prompt.
+
+    ``failures`` makes the first N calls for each prompt raise, to exercise retries.
+    """
+
+    def __init__(self, delay: float = 0.0, failures: int = 0, size: int = 8):
+        self.delay = delay
+        self.failures = failures
+        self.size = size
+        self.calls: Dict[str, int] = {}
+
+    async def generate_images(self, prompt: str, model: str, number_of_images: int = 1) -> List[bytes]:
+        self.calls[prompt] = self.calls.get(prompt, 0) + 1
+        await asyncio.sleep(self.delay)
+        if self.calls[prompt] <= self.failures:
+            raise RuntimeError("fake generator failure")
+        rgb = hashlib.sha256(prompt.encode("utf-8")).digest()[:3]
+        return [_solid_png(self.size, rgb) for _ in range(number_of_images)]
+
+
+def _solid_png(size: int, rgb: bytes) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    raw = b"".join(b"\x00" + rgb * size for _ in range(size))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+def create_generator(fake: bool = False):
+    if fake:
+        return FakeImageGenerator()
+    if OpenAIImageGeneration is None:
+        raise RuntimeError("emergentintegrations is not installed; use --fake to run offline")
+    api_key = os.environ.get('EMERGENT_LLM_KEY')
+    if not api_key:
+        raise RuntimeError("EMERGENT_LLM_KEY not found in environment")
+    return OpenAIImageGeneration(api_key=api_key)
+
+
+class Manifest:
+    """``manifest.json`` in the output directory: filename -> prompt hash and metadata."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        if path.exists():
+            self.entries = json.loads(path.read_text(encoding="utf-8"))
+
+    def is_current(self, job: ImageJob, digest: str, output_dir: Path) -> bool:
+        path = output_dir / job.filename
+        if not path.exists():
+            return False
+        entry = self.entries.get(job.filename)
+        if entry is None:
+            # Images written before the manifest existed are adopted as-is
+            self.record(job, digest, None, path.stat().st_size)
+            return True
+        return entry.get("prompt_hash") == digest
+
+    def record(self, job: ImageJob, digest: str, model: Optional[str], size: int):
+        self.entries[job.filename] = {
+            "prompt_hash": digest,
+            "prompt": job.prompt,
+            "model": model,
+            "bytes": size,
+            "generated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def save(self):
+        # Write-then-rename so an interrupted run never leaves a truncated manifest
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=2, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+async def generate_with_retry(generator, job: ImageJob, model: str, max_attempts: int,
+                              base_delay: float) -> bytes:
+    for attempt in range(1, max_attempts + 1):
+        try:
+            images = await generator.generate_images(prompt=job.prompt, model=model, number_of_images=1)
+            if images:
+                return images[0]
+            error: Exception = RuntimeError("generator returned no image")
+        except Exception as e:
+            error = e
+        if attempt == max_attempts:
+            raise error
+        # Exponential backoff with full jitter
+        delay = random.uniform(0, base_delay * 2 ** (attempt - 1))
+        logger.warning("%s attempt %d/%d failed (%s); retrying in %.1fs",
+                       job.filename, attempt, max_attempts, error, delay)
+        await asyncio.sleep(delay)
+
+
+async def run_pipeline(jobs: List[ImageJob], generator, output_dir: Path = IMAGE_OUTPUT_DIR,
+                       model: str = IMAGE_MODEL, concurrency: int = IMAGE_CONCURRENCY,
+                       max_attempts: int = IMAGE_MAX_ATTEMPTS, retry_base_delay: float = IMAGE_RETRY_BASE_DELAY,
+                       force: bool = False) -> Dict[str, list]:
+    """Generate every job not already current in the manifest.
+
+    Returns ``{"generated": [...], "skipped": [...], "failed": [{filename, error}]}``.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = Manifest(output_dir / MANIFEST_NAME)
+    report: Dict[str, list] = {"generated": [], "skipped": [], "failed": []}
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for job in jobs:
+        digest = prompt_hash(job.prompt, model)
+        if not force and manifest.is_current(job, digest, output_dir):
+            report["skipped"].append(job.filename)
+        else:
+            queue.put_nowait((job, digest))
+    manifest.save()
+
+    async def worker():
+        while True:
+            try:
+                job, digest = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                data = await generate_with_retry(generator, job, model, max_attempts, retry_base_delay)
+            except Exception as e:
+                logger.error("Failed to generate %s: %s", job.filename, e)
+                report["failed"].append({"filename": job.filename, "error": str(e)})
+                continue
+            (output_dir / job.filename).write_bytes(data)
+            manifest.record(job, digest, model, len(data))
+            manifest.save()
+            report["generated"].append(job.filename)
+            logger.info("Generated %s in %.1fs", job.filename, time.perf_counter() - started)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, queue.qsize())))))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--set", choices=sorted(IMAGE_SETS), action="append", dest="sets",
+                        help="image set to generate (repeatable; default: all)")
+    parser.add_argument("--output-dir", type=Path, default=IMAGE_OUTPUT_DIR)
+    parser.add_argument("--concurrency", type=int, default=IMAGE_CONCURRENCY)
+    parser.add_argument("--max-attempts", type=int, default=IMAGE_MAX_ATTEMPTS)
+    parser.add_argument("--force", action="store_true", help="regenerate images already in the manifest")
+    parser.add_argument("--fake", action="store_true", help="use the offline fake generator")
+    parser.add_argument("--no-variants", action="store_true", help="skip building responsive WebP variants")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    jobs = [job for name in (args.sets or sorted(IMAGE_SETS)) for job in IMAGE_SETS[name]]
+    report = asyncio.run(run_pipeline(
+        jobs, create_generator(args.fake), output_dir=args.output_dir, concurrency=args.concurrency,
+        max_attempts=args.max_attempts, force=args.force
+    ))
+    if not args.no_variants:
+        from image_variants import build_variants
+        report["variants"] = build_variants(args.output_dir)
+    print(json.dumps(report, indent=2))
+    if report["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
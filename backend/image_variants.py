@@ -0,0 +1,178 @@
+"""Responsive WebP variants for the generated images.
+
+    python image_variants.py                       # every image in IMAGE_OUTPUT_DIR
+    python image_variants.py --source-dir /tmp/images
+
+Each source image gets thumb/medium/large WebP renditions under ``variants/``,
+named by content hash so they can be cached forever. ``variants.json`` maps
+the public source URL (``/images/<name>``) to its renditions; the API reads it
+to return ``image_variants`` alongside ``images``.
+"""
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from PIL import Image
+except ImportError:  # only needed to build variants, not to serve the manifest
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+VARIANT_WIDTHS = {"thumb": 320, "medium": 768, "large": 1600}
+WEBP_QUALITY = int(os.environ.get('IMAGE_WEBP_QUALITY', '80'))
+VARIANTS_DIR = "variants"
+VARIANTS_MANIFEST = "variants.json"
+SOURCE_SUFFIXES = (".png", ".jpg", ".jpeg")
+PUBLIC_PREFIX = "/images"
+
+
+def render_variants(data: bytes, stem: str, widths: Dict[str, int] = VARIANT_WIDTHS,
+                    quality: int = WEBP_QUALITY) -> Dict[str, Dict[str, Any]]:
+    """Resize ``data`` to each width (never upscaling) and encode as WebP.
+
+    Returns ``{name: {"filename", "width", "height", "data"}}``.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is required to build image variants")
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        image = source.convert("RGBA" if "A" in source.getbands() else "RGB")
+
+    variants = {}
+    for name, width in widths.items():
+        width = min(width, image.width)
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        buffer = io.BytesIO()
+        resized.save(buffer, "WEBP", quality=quality, method=6)
+        encoded = buffer.getvalue()
+        digest = hashlib.sha256(encoded).hexdigest()[:12]
+        variants[name] = {
+            "filename": f"{stem}.{name}.{digest}.webp",
+            "width": width,
+            "height": height,
+            "data": encoded,
+        }
+    return variants
+
+
+def build_variants(source_dir: Path, public_prefix: str = PUBLIC_PREFIX, force: bool = False) -> Dict[str, list]:
+    """Render variants for every source image whose content changed since the last run."""
+    source_dir = Path(source_dir)
+    output_dir = source_dir / VARIANTS_DIR
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = source_dir / VARIANTS_MANIFEST
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else {}
+    report: Dict[str, list] = {"built": [], "skipped": [], "removed": []}
+
+    sources = sorted(p for p in source_dir.iterdir() if p.suffix.lower() in SOURCE_SUFFIXES)
+    seen = set()
+    for path in sources:
+        url = f"{public_prefix}/{path.name}"
+        seen.add(url)
+        data = path.read_bytes()
+        source_hash = hashlib.sha256(data).hexdigest()
+        entry = manifest.get(url)
+        if (not force and entry and entry["source_hash"] == source_hash
+                and all((output_dir / Path(v["url"]).name).exists() for v in entry["variants"].values())):
+            report["skipped"].append(path.name)
+            continue
+
+        variants = render_variants(data, path.stem)
+        for variant in variants.values():
+            (output_dir / variant["filename"]).write_bytes(variant["data"])
+        if entry:
+            _remove_stale(output_dir, entry, {v["filename"] for v in variants.values()})
+        with Image.open(io.BytesIO(data)) as image:
+            width, height = image.size
+        manifest[url] = {
+            "source_hash": source_hash,
+            "width": width,
+            "height": height,
+            "bytes": len(data),
+            "variants": {
+                name: {
+                    "url": f"{public_prefix}/{VARIANTS_DIR}/{v['filename']}",
+                    "width": v["width"],
+                    "height": v["height"],
+                    "bytes": len(v["data"]),
+                }
+                for name, v in variants.items()
+            },
+        }
+        report["built"].append(path.name)
+        logger.info("Built variants for %s: %s", path.name,
+                    ", ".join(f"{n} {len(v['data']) // 1024}KB" for n, v in variants.items()))
+
+    for url in sorted(set(manifest) - seen):
+        _remove_stale(output_dir, manifest.pop(url), set())
+        report["removed"].append(url)
+
+    tmp = manifest_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, manifest_path)
+    return report
+
+
+def _remove_stale(output_dir: Path, entry: dict, keep: set):
+    for variant in entry["variants"].values():
+        name = Path(variant["url"]).name
+        if name not in keep:
+            (output_dir / name).unlink(missing_ok=True)
+
+
+class VariantManifest:
+    """Read side of ``variants.json``: source image URL -> responsive renditions."""
+
+    def __init__(self, entries: Optional[Dict[str, dict]] = None):
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path: Path) -> "VariantManifest":
+        path = Path(path)
+        if not path.exists():
+            logger.info("No image variants manifest at %s", path)
+            return cls()
+        return cls(json.loads(path.read_text(encoding="utf-8")))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, images: Iterable[str]) -> List[Dict[str, Any]]:
+        """Responsive renditions for each of ``images`` that has them, in order."""
+        found = []
+        for src in images:
+            entry = self.entries.get(src)
+            if entry:
+                found.append({
+                    "src": src,
+                    "width": entry["width"],
+                    "height": entry["height"],
+                    "variants": {
+                        name: {"url": v["url"], "width": v["width"], "height": v["height"]}
+                        for name, v in entry["variants"].items()
+                    },
+                })
+        return found
+
+
+def main():
+    from image_pipeline import IMAGE_OUTPUT_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source-dir", type=Path, default=IMAGE_OUTPUT_DIR)
+    parser.add_argument("--force", action="store_true", help="rebuild variants even if the source is unchanged")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    print(json.dumps(build_variants(args.source_dir, force=args.force), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+_AMOUNT_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def normalize_budget(budget: str) -> str:
+    # "₹10,000", "10000 INR" and "Rs 10000" are one budget; words like
+    # "Mid-Range" just fold case and spacing
+    amounts = [a.replace(",", "") for a in _AMOUNT_RE.findall(budget)]
+    if amounts:
+        return "inr:" + "-".join(str(float(a)).rstrip("0").rstrip(".") for a in amounts)
+    return " ".join(budget.casefold().replace("-", " ").split())
+
+
+def canonical_itinerary_request(days: int, interests: List[str], budget: str,
+                                special_requirements: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "days": days,
+        "interests": sorted({" ".join(i.casefold().split()) for i in interests if i.strip()}),
+        "budget": normalize_budget(budget),
+        "special_requirements": " ".join((special_requirements or "").casefold().split()),
+    }
+
+
+def request_key(canonical: Dict[str, Any]) -> str:
+    raw = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlightCache:
+    """Content-addressed TTL cache where concurrent misses on one key share a single load.
+
+    ``clear()`` starts a new generation: loads already running finish for
+    their own callers but are neither stored nor shared with later ones.
+    """
+
+    def __init__(self, ttl: float = 86400.0, max_entries: int = 2048):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.generation = 0
+        self.hits = 0
+        self.shared = 0
+        self.misses = 0
+
+    def _get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def has(self, key: str) -> bool:
+        """Whether ``key`` is cached or being loaded, without counting a lookup."""
+        return key in self._inflight or self._get(key) is not None
+
+    async def get_or_create(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """Return ``(value, status)`` where status is ``hit``, ``shared`` or ``miss``."""
+        value = self._get(key)
+        if value is not None:
+            self.hits += 1
+            return value, "hit"
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.shared += 1
+            return await asyncio.shield(task), "shared"
+
+        self.misses += 1
+
+        generation = self.generation
+
+        async def load():
+            value = await factory()
+            # Built from data that a clear() since then declared stale
+            if value is not None and generation == self.generation:
+                self._set(key, value)
+            return value
+
+        def done(finished: asyncio.Future):
+            if self._inflight.get(key) is finished:
+                del self._inflight[key]
+
+        # Run the load as its own task so a disconnecting first caller does not
+        # cancel it for everyone else waiting on the same key
+        task = self._inflight[key] = asyncio.ensure_future(load())
+        task.add_done_callback(done)
+        return await asyncio.shield(task), "miss"
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._inflight.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "shared": self.shared,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.shared) / lookups if lookups else 0.0,
+            "in_flight": len(self._inflight),
+            "generation": self.generation,
+        }
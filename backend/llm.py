@@ -0,0 +1,206 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+try:
+    from emergentintegrations.llm.chat import LlmChat, UserMessage
+except ImportError:  # offline / test environments run against the fake backend
+    LlmChat = None
+
+    @dataclass
+    class UserMessage:
+        text: str
+
+# "emergent" talks to the real provider; "fake" emits canned tokens locally
+LLM_BACKEND = os.environ.get('LLM_BACKEND', 'emergent')
+FAKE_LLM_FIRST_TOKEN_DELAY = float(os.environ.get('FAKE_LLM_FIRST_TOKEN_DELAY', '0.2'))
+FAKE_LLM_TOKEN_DELAY = float(os.environ.get('FAKE_LLM_TOKEN_DELAY', '0.02'))
+FAKE_LLM_TOKENS = int(os.environ.get('FAKE_LLM_TOKENS', '60'))
+
+FAKE_REPLY = (
+    "Jharkhand is home to Hundru, Dassam and Jonha falls, Betla National Park and a living tribal "
+    "culture. Visit between October and March, join the Sarhul and Karma festivals, stay in tribal "
+    "homestays and carry a reusable bottle to keep the forests clean."
+)
+
+
+class FakeLlmChat:
+    """Stand-in for LlmChat that streams a canned reply with configurable delays."""
+
+    def __init__(self, session_id: str, system_message: str = "",
+                 first_token_delay: float = FAKE_LLM_FIRST_TOKEN_DELAY,
+                 token_delay: float = FAKE_LLM_TOKEN_DELAY, tokens: int = FAKE_LLM_TOKENS):
+        self.session_id = session_id
+        self.system_message = system_message
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.tokens = tokens
+        self.provider = "fake"
+        self.model = "fake"
+
+    def with_model(self, provider: str, model: str):
+        self.provider = provider
+        self.model = model
+        return self
+
+    def _reply_tokens(self, message: UserMessage):
+        words = f"You asked: {message.text}. {FAKE_REPLY}".split(" ")
+        words = (words * (self.tokens // len(words) + 1))[:self.tokens]
+        return [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+
+    async def stream_message(self, message: UserMessage) -> AsyncIterator[str]:
+        await asyncio.sleep(self.first_token_delay)
+        for i, token in enumerate(self._reply_tokens(message)):
+            if i:
+                await asyncio.sleep(self.token_delay)
+            yield token
+
+    async def send_message(self, message: UserMessage) -> str:
+        return "".join([token async for token in self.stream_message(message)])
+
+
+def create_chat(api_key: str, session_id: str, system_message: str):
+    if LLM_BACKEND == "fake":
+        return FakeLlmChat(session_id=session_id, system_message=system_message)
+    if LlmChat is None:
+        raise RuntimeError("emergentintegrations is not installed; set LLM_BACKEND=fake to run offline")
+    return LlmChat(api_key=api_key, session_id=session_id, system_message=system_message)
+
+
+async def stream_reply(chat, message: UserMessage) -> AsyncIterator[str]:
+    """Yield reply text as it arrives; clients without streaming yield one chunk.
+
+    emergentintegrations' LlmChat only offers ``send_message``, so with the
+    real provider this yields the full reply once it is complete; only
+    FakeLlmChat streams token by token.
+    """
+    stream = getattr(chat, "stream_message", None)
+    if stream is None:
+        yield await chat.send_message(message)
+        return
+    async for token in stream(message):
+        yield token
+
+
+class _PooledClient:
+    __slots__ = ("client", "lock", "last_used", "uses")
+
+    def __init__(self, client):
+        self.client = client
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self.uses = 0
+
+
+class ChatClientPool:
+    """Bounded registry of warm chat clients keyed by session id.
+
+    Clients are reused across requests of the same session, evicted after
+    ``idle_ttl`` seconds or least-recently-used beyond ``max_sessions``, and
+    replaced after ``max_uses`` calls so the history a client accumulates
+    stays bounded. Requests on one session are serialized, and at most
+    ``max_concurrency`` provider calls run at once across all sessions.
+    """
+
+    def __init__(self, factory: Callable[..., Any], max_sessions: int = 1000,
+                 idle_ttl: float = 900.0, max_concurrency: int = 16, max_uses: Optional[int] = None):
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_concurrency = max_concurrency
+        self.max_uses = max_uses
+        self._entries: "OrderedDict[str, _PooledClient]" = OrderedDict()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self.recycled = 0
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _evict(self):
+        now = time.monotonic()
+        for session_id, entry in list(self._entries.items()):
+            over_capacity = len(self._entries) > self.max_sessions
+            idle = now - entry.last_used > self.idle_ttl
+            if not (over_capacity or idle):
+                # Entries are kept in last-used order, so the rest are fresher
+                break
+            if entry.lock.locked():
+                continue
+            del self._entries[session_id]
+            self.evicted += 1
+
+    def needs_client(self, session_id: str) -> bool:
+        """True when the next checkout of ``session_id`` will build a new client."""
+        entry = self._entries.get(session_id)
+        return entry is None or self._spent(entry)
+
+    def _spent(self, entry: _PooledClient) -> bool:
+        return self.max_uses is not None and entry.uses >= self.max_uses and not entry.lock.locked()
+
+    def get(self, session_id: str, **factory_kwargs):
+        """Checkout entry for ``session_id``; ``factory_kwargs`` only apply when a client is built."""
+        entry = self._entries.get(session_id)
+        if entry is not None and self._spent(entry):
+            del self._entries[session_id]
+            self.recycled += 1
+            entry = None
+        if entry is None:
+            entry = self._entries[session_id] = _PooledClient(self.factory(session_id, **factory_kwargs))
+            self.created += 1
+        else:
+            self.reused += 1
+        entry.last_used = time.monotonic()
+        self._entries.move_to_end(session_id)
+        self._evict()
+        return entry
+
+    @asynccontextmanager
+    async def session(self, session_id: str, admission=None, **factory_kwargs):
+        """Check out the session's client.
+
+        ``admission`` (an async context manager such as an admission slot) is
+        entered once the session's own turn comes, so a request queued behind
+        another on the same session holds no slot while it waits.
+        """
+        entry = self.get(session_id, **factory_kwargs)
+        async with AsyncExitStack() as stack:
+            self.waiting += 1
+            try:
+                await entry.lock.acquire()
+                stack.callback(entry.lock.release)
+                if admission is not None:
+                    await stack.enter_async_context(admission)
+                await self._semaphore.acquire()
+                stack.callback(self._semaphore.release)
+            finally:
+                self.waiting -= 1
+
+            self.in_flight += 1
+            entry.uses += 1
+            try:
+                yield entry.client
+            finally:
+                self.in_flight -= 1
+                entry.last_used = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        checkouts = self.created + self.reused
+        return {
+            "sessions": len(self._entries),
+            "max_sessions": self.max_sessions,
+            "occupancy": len(self._entries) / self.max_sessions if self.max_sessions else 0.0,
+            "created": self.created,
+            "reused": self.reused,
+            "reuse_rate": self.reused / checkouts if checkouts else 0.0,
+            "evicted": self.evicted,
+            "recycled": self.recycled,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+        }
@@ -0,0 +1,302 @@
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, List, Optional, Tuple
+
+from anyio import to_thread
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+MEDIA_URL_PREFIX = "/api/media/"
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Blobs are served from the API origin, so anything a browser could run there
+# (HTML, SVG with script) is refused
+BLOCKED_IMAGE_TYPES = ("image/svg+xml",)
+READ_CHUNK_SIZE = 64 * 1024
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_DATA_URI_RE = re.compile(r"^data:(?P<type>[\w.+-]+/[\w.+-]+)?(?:;[\w-]+=[^;,]*)*;base64,(?P<data>.*)$", re.S)
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class MediaTooLarge(ValueError):
+    pass
+
+
+class UnsupportedMediaType(ValueError):
+    pass
+
+
+def check_image_type(content_type: str):
+    content_type = content_type.split(";")[0].strip().lower()
+    if not content_type.startswith("image/") or content_type in BLOCKED_IMAGE_TYPES:
+        raise UnsupportedMediaType(f"Only raster image uploads are accepted, got {content_type or 'no type'}")
+
+
+@dataclass
+class Blob:
+    digest: str
+    size: int
+    content_type: str
+
+
+def is_digest(value: str) -> bool:
+    return bool(_DIGEST_RE.match(value))
+
+
+def media_url(digest: str) -> str:
+    return f"{MEDIA_URL_PREFIX}{digest}"
+
+
+def parse_data_uri(value: str) -> Optional[Tuple[bytes, str]]:
+    """Decode a ``data:<type>;base64,...`` string; anything else returns None."""
+    if not value.startswith("data:"):
+        return None
+    match = _DATA_URI_RE.match(value)
+    if not match:
+        return None
+    try:
+        data = base64.b64decode(match.group("data"), validate=False)
+    except (binascii.Error, ValueError):
+        return None
+    return data, match.group("type") or "application/octet-stream"
+
+
+class FilesystemBlobStore:
+    """Content-addressed blobs on disk: ``<root>/ab/cd/<sha256>`` plus a ``.json`` sidecar.
+
+    File IO runs in worker threads so a slow disk never stalls the event loop.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    async def exists(self, digest: str) -> bool:
+        return await to_thread.run_sync(self._path(digest).exists)
+
+    async def put(self, data: bytes, content_type: str) -> Tuple[Blob, bool]:
+        async def chunks():
+            yield data
+        return await self.put_stream(chunks(), content_type)
+
+    def _open_upload(self) -> Tuple[BinaryIO, str]:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        return os.fdopen(fd, "wb"), tmp
+
+    def _commit_upload(self, tmp: str, digest: str, size: int, content_type: str) -> bool:
+        path = self._path(digest)
+        if path.exists():
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.with_suffix(".json").write_text(json.dumps({"content_type": content_type, "size": size}))
+        os.replace(tmp, path)
+        return True
+
+    @staticmethod
+    def _discard(tmp: str):
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], content_type: str,
+                         max_bytes: Optional[int] = None) -> Tuple[Blob, bool]:
+        """Store the stream once; returns ``(blob, created)``, created False for a duplicate."""
+        sha = hashlib.sha256()
+        size = 0
+        f, tmp = await to_thread.run_sync(self._open_upload)
+        try:
+            try:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_bytes is not None and size > max_bytes:
+                        raise MediaTooLarge(f"Upload exceeds {max_bytes} bytes")
+                    sha.update(chunk)
+                    await to_thread.run_sync(f.write, chunk)
+            finally:
+                await to_thread.run_sync(f.close)
+            digest = sha.hexdigest()
+            if not await to_thread.run_sync(self._commit_upload, tmp, digest, size, content_type):
+                return await self.stat(digest), False
+            return Blob(digest, size, content_type), True
+        finally:
+            await to_thread.run_sync(self._discard, tmp)
+
+    def _stat(self, digest: str) -> Optional[Blob]:
+        path = self._path(digest)
+        if not path.exists():
+            return None
+        meta = json.loads(path.with_suffix(".json").read_text())
+        return Blob(digest, meta["size"], meta["content_type"])
+
+    async def stat(self, digest: str) -> Optional[Blob]:
+        return await to_thread.run_sync(self._stat, digest)
+
+    async def read(self, digest: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield bytes ``start``..``end`` inclusive."""
+        f = await to_thread.run_sync(open, self._path(digest), "rb")
+        try:
+            await to_thread.run_sync(f.seek, start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = READ_CHUNK_SIZE if remaining is None else min(READ_CHUNK_SIZE, remaining)
+                chunk = await to_thread.run_sync(f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            await to_thread.run_sync(f.close)
+
+
+class GridFSBlobStore:
+    """Content-addressed blobs in a GridFS bucket, the digest used as file id."""
+
+    def __init__(self, db, bucket_name: str = "media"):
+        from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name)
+        self.files = db[f"{bucket_name}.files"]
+
+    async def exists(self, digest: str) -> bool:
+        return await self.files.count_documents({"_id": digest}, limit=1) > 0
+
+    async def put(self, data: bytes, content_type: str) -> Tuple[Blob, bool]:
+        async def chunks():
+            yield data
+        return await self.put_stream(chunks(), content_type)
+
+    async def put_stream(self, chunks: AsyncIterator[bytes], content_type: str,
+                         max_bytes: Optional[int] = None) -> Tuple[Blob, bool]:
+        # The digest is only known at the end, so spool to a temp file first
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+            sha = hashlib.sha256()
+            size = 0
+            async for chunk in chunks:
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise MediaTooLarge(f"Upload exceeds {max_bytes} bytes")
+                sha.update(chunk)
+                spool.write(chunk)
+            digest = sha.hexdigest()
+            if await self.exists(digest):
+                return await self.stat(digest), False
+            spool.seek(0)
+            await self.bucket.upload_from_stream_with_id(
+                digest, digest, spool, metadata={"contentType": content_type}
+            )
+        return Blob(digest, size, content_type), True
+
+    async def stat(self, digest: str) -> Optional[Blob]:
+        doc = await self.files.find_one({"_id": digest})
+        if doc is None:
+            return None
+        return Blob(digest, doc["length"], (doc.get("metadata") or {}).get("contentType", "application/octet-stream"))
+
+    async def read(self, digest: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        stream = await self.bucket.open_download_stream(digest)
+        stream.seek(start)
+        remaining = (stream.length if end is None else end + 1) - start
+        while remaining > 0:
+            chunk = await stream.read(min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def create_blob_store(kind: str, root: Path, db=None):
+    if kind == "gridfs":
+        return GridFSBlobStore(db)
+    if kind == "filesystem":
+        return FilesystemBlobStore(root)
+    raise ValueError(f"Unknown media backend: {kind}")
+
+
+async def externalize_images(store, images: List[str]) -> List[str]:
+    """Replace inline base64 data URIs with media references; other entries pass through.
+
+    Raises UnsupportedMediaType for a data URI that is not a raster image.
+    """
+    refs = []
+    for image in images:
+        decoded = parse_data_uri(image)
+        if decoded is None:
+            refs.append(image)
+            continue
+        check_image_type(decoded[1])
+        blob, _ = await store.put(*decoded)
+        refs.append(media_url(blob.digest))
+    return refs
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Resolve a single ``bytes=`` range to inclusive offsets.
+
+    Returns None when there is no usable range (serve the whole body) and
+    raises ValueError when the range cannot be satisfied.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match or not any(match.groups()):
+        # Multi-range and malformed requests fall back to the full body
+        return None
+    first, last = match.groups()
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+def blob_response(request: Request, store, blob: Blob) -> Response:
+    etag = f'"{blob.digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": MEDIA_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        "X-Content-Type-Options": "nosniff",
+        "Content-Security-Policy": "default-src 'none'; sandbox",
+    }
+    try:
+        check_image_type(blob.content_type)
+    except UnsupportedMediaType:
+        # Stored before uploads were limited to images; never render it inline
+        headers["Content-Disposition"] = "attachment"
+    if etag in [tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    if_range = request.headers.get("if-range")
+    try:
+        byte_range = parse_range(request.headers.get("range"), blob.size) if not if_range or if_range == etag else None
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{blob.size}"})
+
+    if byte_range is None:
+        start, end, status = 0, blob.size - 1, 200
+    else:
+        (start, end), status = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{blob.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    if request.method == "HEAD":
+        return Response(status_code=status, headers=headers, media_type=blob.content_type)
+    return StreamingResponse(store.read(blob.digest, start, end), status_code=status, headers=headers,
+                             media_type=blob.content_type)
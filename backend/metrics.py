@@ -0,0 +1,249 @@
+import bisect
+import contextvars
+import math
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from pymongo import monitoring
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+TOKEN_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    # The chat SDK returns plain text without usage, so count word pieces;
+    # close enough to BPE counts for English and Hindi prose to track trends
+    return len(_WORD_RE.findall(text or ""))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count], sum
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total[0])}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self._metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")))
+HTTP_REQUEST_BYTES = REGISTRY.register(Histogram(
+    "http_request_size_bytes", "HTTP request body size.", ("method", "route"), SIZE_BUCKETS))
+HTTP_RESPONSE_BYTES = REGISTRY.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size as sent.", ("method", "route"), SIZE_BUCKETS))
+MONGO_LATENCY = REGISTRY.register(Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency.", ("command", "collection")))
+MONGO_FAILURES = REGISTRY.register(Counter(
+    "mongo_command_failures_total", "Failed MongoDB commands.", ("command", "collection")))
+MONGO_REQUEST_TIME = REGISTRY.register(Histogram(
+    "http_request_mongo_seconds", "Total MongoDB time spent inside one HTTP request.", ("route",)))
+LLM_LATENCY = REGISTRY.register(Histogram(
+    "llm_call_duration_seconds", "LLM call latency, to the last token.", ("operation",)))
+LLM_FIRST_TOKEN = REGISTRY.register(Histogram(
+    "llm_time_to_first_token_seconds", "Streaming LLM latency to the first token.", ("operation",)))
+LLM_TOKENS = REGISTRY.register(Histogram(
+    "llm_tokens", "Estimated prompt and completion tokens per LLM call.", ("operation", "kind"), TOKEN_BUCKETS))
+LLM_FAILURES = REGISTRY.register(Counter(
+    "llm_call_failures_total", "Failed LLM calls.", ("operation",)))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    "admission_rejected_total", "Requests shed by admission control.", ("route", "reason")))
+WRITE_BUFFER_DEAD_LETTERS = REGISTRY.register(Counter(
+    "write_buffer_dead_letters_total", "Buffered documents that could not be written and were dead-lettered.",
+    ("collection",)))
+
+
+class RequestTimings:
+    """Per-request accumulators behind the Server-Timing header."""
+
+    __slots__ = ("db_seconds", "db_calls", "llm_seconds", "llm_calls")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.db_calls = 0
+        self.llm_seconds = 0.0
+        self.llm_calls = 0
+
+    def header(self, total_seconds: float) -> str:
+        parts = [f"app;dur={total_seconds * 1000:.1f}"]
+        if self.db_calls:
+            parts.append(f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_calls} commands"')
+        if self.llm_calls:
+            parts.append(f'llm;dur={self.llm_seconds * 1000:.1f};desc="{self.llm_calls} calls"')
+        return ", ".join(parts)
+
+
+# Motor runs commands on its executor threads with the caller's context copied
+# in, so the listener can attribute database time to the current request
+current_timings: contextvars.ContextVar[Optional[RequestTimings]] = contextvars.ContextVar(
+    "current_timings", default=None)
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    def __init__(self):
+        # Only started events carry the command document, so remember its collection
+        self._collections: Dict[Tuple[object, int], str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = target if isinstance(target, str) else ""
+
+    def succeeded(self, event):
+        self._record(event)
+
+    def failed(self, event):
+        collection = self._record(event)
+        MONGO_FAILURES.inc(event.command_name, collection)
+
+    def _record(self, event) -> str:
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        seconds = event.duration_micros / 1e6
+        MONGO_LATENCY.observe(seconds, event.command_name, collection)
+        timings = current_timings.get()
+        if timings is not None:
+            timings.db_seconds += seconds
+            timings.db_calls += 1
+        return collection
+
+
+def observe_llm(operation: str, seconds: float, prompt: str, completion: str,
+                first_token_seconds: Optional[float] = None):
+    LLM_LATENCY.observe(seconds, operation)
+    if first_token_seconds is not None:
+        LLM_FIRST_TOKEN.observe(first_token_seconds, operation)
+    LLM_TOKENS.observe(estimate_tokens(prompt), operation, "prompt")
+    LLM_TOKENS.observe(estimate_tokens(completion), operation, "completion")
+    timings = current_timings.get()
+    if timings is not None:
+        timings.llm_seconds += seconds
+        timings.llm_calls += 1
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and payload sizes per route template.
+
+    With ``server_timing_sample`` > 0 that fraction of responses also carries
+    a ``Server-Timing`` header splitting the time into app, db and llm.
+    """
+
+    def __init__(self, app, server_timing_sample: float = 0.0):
+        self.app = app
+        self.server_timing_sample = server_timing_sample
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        sample = self.server_timing_sample > 0 and random.random() < self.server_timing_sample
+        state = {"status": 500, "request_bytes": 0, "response_bytes": 0}
+
+        async def receive_counted():
+            message = await receive()
+            if message["type"] == "http.request":
+                state["request_bytes"] += len(message.get("body", b""))
+            return message
+
+        async def send_counted(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                if sample:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", timings.header(time.perf_counter() - started).encode()))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                state["response_bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_counted, send_counted)
+        finally:
+            current_timings.reset(token)
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, template, str(state["status"]))
+            HTTP_REQUEST_BYTES.observe(state["request_bytes"], method, template)
+            HTTP_RESPONSE_BYTES.observe(state["response_bytes"], method, template)
+            MONGO_REQUEST_TIME.observe(timings.db_seconds, template)
@@ -0,0 +1,80 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+MAX_PAGE_LIMIT = 1000
+# Without `limit`, a page holds as much as the old unpaged to_list(1000) did, so
+# clients that never follow X-Next-Cursor see the same results as before
+DEFAULT_PAGE_LIMIT = MAX_PAGE_LIMIT
+STREAM_BATCH_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value: Any, doc_id: str) -> str:
+    if isinstance(value, datetime):
+        payload = {"v": value.isoformat(), "t": "dt", "id": doc_id}
+    else:
+        payload = {"v": value, "id": doc_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value = payload["v"]
+        if payload.get("t") == "dt":
+            value = datetime.fromisoformat(value)
+        return value, payload["id"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+
+def keyset_query(query: Dict[str, Any], field: str, after: Optional[str],
+                 descending: bool = False) -> Dict[str, Any]:
+    """Restrict ``query`` to documents strictly past the ``after`` cursor on (field, id)."""
+    if not after:
+        return query
+    value, doc_id = decode_cursor(after)
+    op = "$lt" if descending else "$gt"
+    past_cursor = {"$or": [
+        {field: {op: value}},
+        {field: value, "id": {op: doc_id}},
+    ]}
+    return {"$and": [query, past_cursor]} if query else past_cursor
+
+
+def keyset_sort(field: str, descending: bool = False) -> List[Tuple[str, int]]:
+    direction = -1 if descending else 1
+    return [(field, direction), ("id", direction)]
+
+
+async def fetch_page(collection, query: Dict[str, Any], field: str, limit: int,
+                     after: Optional[str] = None, descending: bool = False,
+                     projection: Optional[Dict[str, Any]] = None) -> Tuple[List[dict], Optional[str]]:
+    """Fetch one keyset page; returns the documents and the cursor for the next page, if any."""
+    cursor = collection.find(keyset_query(query, field, after, descending), projection)
+    docs = await cursor.sort(keyset_sort(field, descending)).limit(limit + 1).to_list(limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    last = docs[-1]
+    return docs, encode_cursor(last[field], last["id"])
+
+
+async def stream_ndjson(collection, query: Dict[str, Any], field: str, decode: Callable[[dict], Any],
+                        after: Optional[str] = None, descending: bool = False,
+                        limit: Optional[int] = None,
+                        projection: Optional[Dict[str, Any]] = None) -> AsyncIterator[bytes]:
+    """Yield one JSON line per document as the driver hands back each batch."""
+    cursor = collection.find(keyset_query(query, field, after, descending), projection)
+    cursor = cursor.sort(keyset_sort(field, descending)).batch_size(STREAM_BATCH_SIZE)
+    if limit:
+        cursor = cursor.limit(limit)
+    async for doc in cursor:
+        yield decode(doc).json(exclude_unset=projection is not None).encode() + b"\n"
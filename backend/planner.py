@@ -0,0 +1,165 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from search_index import tokenize
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Ranchi, where most visitors arrive; routes start from here
+DEFAULT_START = (23.3441, 85.3096)
+STOPS_PER_DAY = 2
+
+# Free-form interests mapped onto catalog categories
+INTEREST_CATEGORIES = {
+    "eco": "eco", "nature": "eco", "wildlife": "eco", "waterfall": "eco", "forest": "eco",
+    "culture": "cultural", "cultural": "cultural", "heritage": "cultural", "tribal": "cultural",
+    "museum": "cultural", "history": "cultural", "handicraft": "cultural",
+    "adventure": "adventure", "trekking": "adventure", "trek": "adventure", "climbing": "adventure",
+    "festival": "festivals", "festivals": "festivals",
+}
+
+
+def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Pairwise great-circle distances in km for points given in degrees."""
+    lat = np.radians(lat)[:, None]
+    lon = np.radians(lon)[:, None]
+    dlat = lat - lat.T
+    dlon = lon - lon.T
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbor_route(dist: np.ndarray, start: int = 0) -> List[int]:
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    route = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[route[-1]])
+        nxt = int(np.argmin(row))
+        route.append(nxt)
+        visited[nxt] = True
+    return route
+
+
+def two_opt(route: List[int], dist: np.ndarray, max_passes: int = 50) -> List[int]:
+    """Improve an open path (first stop fixed) by reversing segments while it shortens."""
+    route = np.array(route)
+    n = len(route)
+    if n < 4:
+        return route.tolist()
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            a, b = route[i - 1], route[i]
+            # Candidate segment ends j > i; the path is open, so the last j has no successor
+            c = route[i + 1:]
+            d = np.append(route[i + 2:], -1)
+            before = dist[a, b] + np.where(d >= 0, dist[c, np.maximum(d, 0)], 0.0)
+            after = dist[a, c] + np.where(d >= 0, dist[b, np.maximum(d, 0)], 0.0)
+            gain = before - after
+            k = int(np.argmax(gain))
+            if gain[k] > 1e-9:
+                j = i + 1 + k
+                route[i:j + 1] = route[i:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return route.tolist()
+
+
+def route_length(route: Sequence[int], dist: np.ndarray) -> float:
+    return float(sum(dist[route[i], route[i + 1]] for i in range(len(route) - 1)))
+
+
+def destination_terms(destination: Dict[str, Any]) -> frozenset:
+    text = " ".join(str(destination.get(f) or "") for f in ("name", "description", "cultural_significance"))
+    return frozenset(tokenize(text))
+
+
+def prepare_catalog(destinations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep located destinations and tokenize them once, ahead of any planning request."""
+    return [
+        {**d, "_terms": destination_terms(d)}
+        for d in destinations
+        if d.get("latitude") is not None and d.get("longitude") is not None
+    ]
+
+
+def interest_score(destination: Dict[str, Any], interest_terms: set, categories: set) -> float:
+    score = 2.0 if destination.get("category") in categories else 0.0
+    terms = destination.get("_terms")
+    if terms is None:
+        terms = destination_terms(destination)
+    return score + len(interest_terms.intersection(terms))
+
+
+def select_destinations(catalog: List[Dict[str, Any]], interests: List[str], limit: int) -> List[Dict[str, Any]]:
+    located = [d for d in catalog if d.get("latitude") is not None and d.get("longitude") is not None]
+    interest_terms = set()
+    for interest in interests:
+        interest_terms.update(tokenize(interest))
+    categories = {INTEREST_CATEGORIES[t] for t in interest_terms if t in INTEREST_CATEGORIES}
+
+    scored = [(interest_score(d, interest_terms, categories), d) for d in located]
+    matching = [item for item in scored if item[0] > 0]
+    # No interest matched anything: fall back to the whole located catalog
+    pool = matching or scored
+    pool.sort(key=lambda item: (-item[0], item[1].get("name", "")))
+    return [d for _, d in pool[:limit]]
+
+
+def split_days(stops: List[int], days: int) -> List[List[int]]:
+    base, extra = divmod(len(stops), days)
+    chunks, start = [], 0
+    for day in range(days):
+        size = base + (1 if day < extra else 0)
+        chunks.append(stops[start:start + size])
+        start += size
+    return chunks
+
+
+def plan_route(catalog: List[Dict[str, Any]], interests: List[str], days: int,
+               start: Optional[Tuple[float, float]] = DEFAULT_START,
+               stops_per_day: int = STOPS_PER_DAY) -> Dict[str, Any]:
+    """Pick destinations for ``interests`` and order them into ``days`` of driving.
+
+    Returns the ordered destinations, per-day stops with their driving distance
+    (straight-line km), and the total distance including the leg from ``start``.
+    """
+    days = max(1, days)
+    chosen = select_destinations(catalog, interests, days * stops_per_day)
+    if not chosen:
+        return {"destinations": [], "days": [], "total_distance_km": 0.0}
+
+    lat = np.array([d["latitude"] for d in chosen], dtype=float)
+    lon = np.array([d["longitude"] for d in chosen], dtype=float)
+    offset = 0
+    if start is not None:
+        lat = np.concatenate([[start[0]], lat])
+        lon = np.concatenate([[start[1]], lon])
+        offset = 1
+
+    dist = haversine_matrix(lat, lon)
+    route = two_opt(nearest_neighbor_route(dist, 0), dist)
+    stops = route[offset:] if offset else route
+
+    day_plans = []
+    previous = route[0] if offset else None
+    for number, chunk in enumerate(split_days(stops, days), start=1):
+        legs = ([previous] if previous is not None else []) + chunk
+        day_plans.append({
+            "day": number,
+            "stops": [chosen[i - offset]["name"] for i in chunk],
+            "distance_km": round(route_length(legs, dist), 1) if chunk else 0.0,
+        })
+        if chunk:
+            previous = chunk[-1]
+
+    return {
+        "destinations": [chosen[i - offset]["name"] for i in stops],
+        "days": day_plans,
+        "total_distance_km": round(route_length(route, dist), 1),
+    }
+
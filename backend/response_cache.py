@@ -0,0 +1,170 @@
+import math
+import time
+from collections import Counter, OrderedDict, defaultdict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from search_index import tokenize
+
+
+def normalize_question(text: str) -> str:
+    # Case, punctuation, stopwords and plurals fold away, so
+    # "What's the best time to visit Hundru Falls?" == "best time visit hundru fall"
+    return " ".join(tokenize(text))
+
+
+# Words that flip a question's meaning; two questions only count as near
+# duplicates when they agree on these and on every number
+NEGATIONS = frozenset({"no", "not", "nor", "never", "cannot", "without", "t", "नहीं", "न", "मत"})
+NEGATING_PREFIXES = ("un", "non", "dis")
+
+
+def meaning_guard(key: str) -> Tuple[Tuple[str, ...], frozenset]:
+    """Numbers (in order) and negation words of a normalized question."""
+    words = key.split()
+    numbers = tuple(w for w in words if any(c.isdigit() for c in w))
+    return numbers, frozenset(w for w in words if w in NEGATIONS)
+
+
+def _negated_pair(words: Set[str], other: Set[str]) -> bool:
+    # "unsafe" against "safe"
+    return any(w.startswith(prefix) and w[len(prefix):] in other
+               for w in words for prefix in NEGATING_PREFIXES)
+
+
+def same_meaning(key: str, other: str) -> bool:
+    if meaning_guard(key) != meaning_guard(other):
+        return False
+    words, other_words = set(key.split()), set(other.split())
+    return not (_negated_pair(words - other_words, other_words - words)
+                or _negated_pair(other_words - words, words - other_words))
+
+
+def char_ngrams(text: str, n: int = 3) -> Counter:
+    padded = f" {text} "
+    return Counter(padded[i:i + n] for i in range(max(1, len(padded) - n + 1)))
+
+
+def _norm(vector: Counter) -> float:
+    return math.sqrt(sum(v * v for v in vector.values()))
+
+
+class _Entry:
+    __slots__ = ("answer", "expires_at", "ngrams", "norm")
+
+    def __init__(self, answer: str, expires_at: float, ngrams: Counter):
+        self.answer = answer
+        self.expires_at = expires_at
+        self.ngrams = ngrams
+        self.norm = _norm(ngrams)
+
+
+class ResponseCache:
+    """Assistant answers keyed by normalized question, with near-duplicate lookup.
+
+    Exact matches hit on the normalized text. Otherwise candidates sharing
+    character trigrams are scored by cosine similarity and the best one at or
+    above ``threshold`` is returned, provided it has the same numbers and
+    negations: "under 2000" never answers "under 5000", nor "unsafe" "safe".
+    """
+
+    def __init__(self, threshold: float = 0.9, ttl: float = 3600.0, max_entries: int = 5000,
+                 max_candidates: int = 50):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_candidates = max_candidates
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for gram in entry.ngrams:
+            keys = self._postings.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[gram]
+
+    def _live(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        return entry
+
+    def _nearest(self, key: str, grams: Counter) -> Tuple[Optional[str], float]:
+        shared: Counter = Counter()
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] += 1
+
+        norm = _norm(grams)
+        best_key, best_score = None, 0.0
+        for candidate, _ in shared.most_common(self.max_candidates):
+            entry = self._live(candidate)
+            if entry is None or not entry.norm or not same_meaning(key, candidate):
+                continue
+            dot = sum(count * entry.ngrams.get(gram, 0) for gram, count in grams.items())
+            score = dot / (norm * entry.norm)
+            if score > best_score:
+                best_key, best_score = candidate, score
+        return best_key, best_score
+
+    def lookup(self, question: str) -> Optional[str]:
+        key = normalize_question(question)
+        if not key:
+            self.misses += 1
+            return None
+
+        entry = self._live(key)
+        if entry is not None:
+            self.exact_hits += 1
+            self._entries.move_to_end(key)
+            return entry.answer
+
+        best_key, score = self._nearest(key, char_ngrams(key))
+        if best_key is not None and score >= self.threshold:
+            self.similar_hits += 1
+            self._entries.move_to_end(best_key)
+            return self._entries[best_key].answer
+
+        self.misses += 1
+        return None
+
+    def store(self, question: str, answer: str):
+        key = normalize_question(question)
+        if not key or not answer:
+            return
+        self._remove(key)
+        entry = self._entries[key] = _Entry(answer, time.monotonic() + self.ttl, char_ngrams(key))
+        for gram in entry.ngrams:
+            self._postings[gram].add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        self._entries.clear()
+        self._postings.clear()
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.similar_hits
+        lookups = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "threshold": self.threshold,
+        }
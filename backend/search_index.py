@@ -0,0 +1,184 @@
+import bisect
+import math
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+# Word characters plus the Devanagari block, so Hindi vowel signs and
+# viramas (which are not matched by \w) stay inside their token.
+TOKEN_RE = re.compile(r"[\w\u0900-\u097F]+")
+
+STOPWORDS = {
+    # English
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "it", "of", "on", "or", "the", "to", "with",
+    # Hindi
+    "का", "की", "के", "को", "में", "से", "है", "हैं", "और", "पर", "यह", "एक",
+}
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize("NFC", text).casefold()
+
+
+def _stem(token: str) -> str:
+    # Light plural folding for Latin script ("falls" -> "fall"); Devanagari is left as-is
+    if token.isascii() and len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+    return [_stem(tok) for tok in TOKEN_RE.findall(normalize(text)) if tok not in STOPWORDS]
+
+
+class _Corpus:
+    def __init__(self, fields: Dict[str, float]):
+        self.fields = fields
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.doc_terms: Dict[str, Dict[str, float]] = {}
+        self.doc_len: Dict[str, float] = {}
+        self.categories: Dict[str, Optional[str]] = {}
+        self.total_len = 0.0
+
+    def add(self, doc: dict):
+        doc_id = doc["id"]
+        self.remove(doc_id)
+
+        terms: Dict[str, float] = defaultdict(float)
+        for field, weight in self.fields.items():
+            for tok in tokenize(doc.get(field)):
+                terms[tok] += weight
+        length = sum(terms.values())
+
+        for term, tf in terms.items():
+            self.postings[term][doc_id] = tf
+        self.doc_terms[doc_id] = dict(terms)
+        self.doc_len[doc_id] = length
+        self.categories[doc_id] = doc.get("category")
+        self.total_len += length
+        return list(terms)
+
+    def remove(self, doc_id: str):
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return []
+        for term in terms:
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_len -= self.doc_len.pop(doc_id, 0.0)
+        self.categories.pop(doc_id, None)
+        return list(terms)
+
+    def score(self, terms: Dict[str, float], category: Optional[str], k1: float, b: float) -> Dict[str, float]:
+        n_docs = len(self.doc_len)
+        if not n_docs:
+            return {}
+        avgdl = (self.total_len / n_docs) or 1.0
+        scores: Dict[str, float] = defaultdict(float)
+        for term, query_weight in terms.items():
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc_id, tf in posting.items():
+                if category and self.categories.get(doc_id) not in (None, category):
+                    continue
+                norm = k1 * (1 - b + b * self.doc_len[doc_id] / avgdl)
+                scores[doc_id] += query_weight * idf * tf * (k1 + 1) / (tf + norm)
+        return scores
+
+
+class SearchIndex:
+    """In-process inverted index with BM25 ranking over several collections.
+
+    ``fields`` maps a collection name to the document fields it indexes and
+    their weights. Documents are keyed on their ``id``; the index only keeps
+    term statistics, callers hydrate hits from the database.
+    """
+
+    def __init__(self, fields: Dict[str, Dict[str, float]], k1: float = 1.2, b: float = 0.75,
+                 max_prefix_expansions: int = 20):
+        self.k1 = k1
+        self.b = b
+        self.max_prefix_expansions = max_prefix_expansions
+        self._corpora = {name: _Corpus(weights) for name, weights in fields.items()}
+        self._vocab: List[str] = []
+        self._vocab_refs: Dict[str, int] = defaultdict(int)
+
+    @property
+    def collections(self) -> List[str]:
+        return list(self._corpora)
+
+    def __len__(self):
+        return sum(len(corpus.doc_len) for corpus in self._corpora.values())
+
+    def add(self, collection: str, doc: dict):
+        corpus = self._corpora[collection]
+        self._release(corpus.remove(doc["id"]))
+        for term in corpus.add(doc):
+            if self._vocab_refs[term] == 0:
+                bisect.insort(self._vocab, term)
+            self._vocab_refs[term] += 1
+
+    def add_many(self, collection: str, docs: Iterable[dict]):
+        for doc in docs:
+            self.add(collection, doc)
+
+    def remove(self, collection: str, doc_id: str):
+        self._release(self._corpora[collection].remove(doc_id))
+
+    def clear(self, collection: Optional[str] = None):
+        names = [collection] if collection else list(self._corpora)
+        for name in names:
+            corpus = self._corpora[name]
+            for doc_id in list(corpus.doc_len):
+                self.remove(name, doc_id)
+
+    def _release(self, terms: List[str]):
+        for term in terms:
+            self._vocab_refs[term] -= 1
+            if self._vocab_refs[term] <= 0:
+                del self._vocab_refs[term]
+                i = bisect.bisect_left(self._vocab, term)
+                if i < len(self._vocab) and self._vocab[i] == term:
+                    del self._vocab[i]
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        start = bisect.bisect_left(self._vocab, prefix)
+        matches = []
+        for term in self._vocab[start:start + self.max_prefix_expansions]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def _query_terms(self, query: str) -> Dict[str, float]:
+        tokens = tokenize(query)
+        terms: Dict[str, float] = defaultdict(float)
+        for tok in tokens:
+            terms[tok] += 1.0
+        # The last token is usually still being typed, so let it match as a prefix too
+        if tokens and query.rstrip() == query:
+            raw_last = TOKEN_RE.findall(normalize(query))[-1]
+            for term in self._expand_prefix(raw_last):
+                if term not in terms:
+                    terms[term] = 0.5
+        return terms
+
+    def search(self, query: str, category: Optional[str] = None, limit: int = 50,
+               collections: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """Return ranked document ids per collection for ``query``."""
+        terms = self._query_terms(query)
+        results: Dict[str, List[str]] = {}
+        for name in collections or self._corpora:
+            scores = self._corpora[name].score(terms, category, self.k1, self.b)
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            results[name] = [doc_id for doc_id, _ in ranked[:limit]]
+        return results
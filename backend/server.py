@@ -1,24 +1,69 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError, model_validator
 from typing import List, Optional, Dict, Any
 import uuid
+import time
 from datetime import datetime, timezone
 import base64
-#from emergentintegrations.llm.chat import LlmChat, UserMessage
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from search_index import SearchIndex
+from geo_index import GridIndex
+from response_cache import ResponseCache
+from catalog_cache import CatalogCache, cache_key, create_backend
+from bulk_ingest import BulkPayloadError, ingest, iter_request_items
+from itinerary_cache import SingleFlightCache, canonical_itinerary_request, request_key
+from planner import plan_route, prepare_catalog
+from event_calendar import (
+    MAX_EVENT_DAYS, RECURRENCES, day_start, day_string, occurrence_query, parse_event_dates, sync_occurrences
+)
+from guide_search import (
+    guide_query, normalize_days, normalize_languages, parse_price_range, parse_sort, split_list
+)
+from image_pipeline import IMAGE_OUTPUT_DIR
+from image_variants import VARIANTS_MANIFEST, VariantManifest
+from media_store import (
+    MediaTooLarge, UnsupportedMediaType, blob_response, check_image_type, create_blob_store, externalize_images,
+    is_digest, media_url
+)
+from http_cache import cached_json_response, dumps, etag_matches, make_etag, not_modified
+from codec import backfill_geo, codec_for, from_mongo, migrate_datetime_fields, to_mongo
+from db_indexes import ensure_indexes, explain_query
+from pagination import (
+    DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT, InvalidCursor, decode_cursor, fetch_page, stream_ndjson
+)
+from write_buffer import WriteBehindBuffer, WriteBufferFull
+from chat_context import ChatContextStore, format_context
+from llm import LLM_BACKEND, ChatClientPool, UserMessage, create_chat, stream_reply
+from admission import AdmissionController, AdmissionRejected
+from metrics import REGISTRY, LLM_FAILURES, MetricsMiddleware, MongoCommandTimer, observe_llm
 #from emergentintegrations.llm.openai.image_generation import OpenAIImageGeneration
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# MongoDB connection; every command is timed for /metrics and Server-Timing
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True, event_listeners=[MongoCommandTimer()])
 db = client[os.environ['DB_NAME']]
 
 # Create the main app without a prefix
@@ -27,25 +72,209 @@ app = FastAPI()
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Helper functions for datetime serialization
-def prepare_for_mongo(data):
-    if isinstance(data, dict):
-        for key, value in data.items():
-            if isinstance(value, datetime):
-                data[key] = value.isoformat()
-    return data
-
-def parse_from_mongo(item):
-    if isinstance(item, dict):
-        for key, value in item.items():
-            if isinstance(value, str) and 'T' in value:
-                try:
-                    item[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                except:
-                    pass
-    return item
+# In-process full-text index over the searchable collections, weighted per field
+SEARCH_FIELDS = {
+    "destinations": {"name": 3.0, "location": 2.0, "description": 1.0},
+    "events": {"name": 3.0, "location": 2.0, "description": 1.0},
+    "guides": {"name": 3.0, "specialization": 2.0, "location": 2.0},
+}
+SEARCH_RESULT_LIMIT = 50
+SEARCH_COLLECTION_TIMEOUT = float(os.environ.get('SEARCH_COLLECTION_TIMEOUT', '0.5'))
+search_index = SearchIndex(SEARCH_FIELDS)
+
+# Radius queries use $geoNear on the 2dsphere index; the grid index answers them
+# when the database cannot (GEO_BACKEND=grid, or an embedded test database)
+GEO_BACKEND = os.environ.get('GEO_BACKEND', 'mongo')
+geo_index = GridIndex()
+
+# Catalog version each collection was last fully indexed at. The indexes live in
+# this process, so a version bumped by another worker means a rebuild.
+search_versions: Dict[str, int] = {}
+search_rebuild_lock = asyncio.Lock()
+
+def index_documents(namespace: str, docs: List[dict]):
+    search_index.add_many(namespace, docs)
+    geo_index.add_many(namespace, docs)
+
+# Read-through cache for destinations, events and guides; writes bump the namespace
+catalog_cache = CatalogCache(
+    create_backend(
+        os.environ.get('CATALOG_CACHE_BACKEND', 'memory'),
+        max_entries=int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', '1024')),
+        redis_url=os.environ.get('REDIS_URL')
+    ),
+    ttl=float(os.environ.get('CATALOG_CACHE_TTL', '300'))
+)
+
+# Assistant answers for repeated and near-duplicate questions
+response_cache = ResponseCache(
+    threshold=float(os.environ.get('RESPONSE_CACHE_THRESHOLD', '0.9')),
+    ttl=float(os.environ.get('RESPONSE_CACHE_TTL', '3600')),
+    max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '5000'))
+)
+
+# Responsive WebP renditions built by image_variants; documents carry the ones
+# matching their images as image_variants, refreshed at startup
+variant_manifest = VariantManifest.load(
+    Path(os.environ.get('IMAGE_VARIANTS_MANIFEST', IMAGE_OUTPUT_DIR / VARIANTS_MANIFEST))
+)
+
+def with_image_variants(obj):
+    obj.image_variants = [ResponsiveImage(**v) for v in variant_manifest.lookup(obj.images)]
+    return obj
+
+# Uploaded media lives in a content-addressed blob store, served from /api/media/{sha256}.
+# Documents only hold those references; inline base64 images are moved out on write.
+MEDIA_MAX_BYTES = int(os.environ.get('MEDIA_MAX_BYTES', str(20 * 1024 * 1024)))
+media_store = create_blob_store(
+    os.environ.get('MEDIA_BACKEND', 'filesystem'),
+    root=Path(os.environ.get('MEDIA_ROOT', ROOT_DIR / 'media')),
+    db=db
+)
+
+async def prepare_media(obj):
+    obj.images = await externalize_images(media_store, obj.images)
+    return with_image_variants(obj)
+
+async def prepare_new_media(obj):
+    try:
+        return await prepare_media(obj)
+    except UnsupportedMediaType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+async def catalog_changed(*namespaces: str, indexed: bool = False):
+    """Invalidate cached reads of ``namespaces``.
+
+    ``indexed`` says this worker already put the change into its search index,
+    so only writes made elsewhere (another worker) leave the index stale.
+    """
+    before = {ns: await catalog_cache.version(ns) for ns in namespaces if indexed and ns in SEARCH_FIELDS}
+    versions = await catalog_cache.invalidate(*namespaces)
+    for namespace, version in before.items():
+        if search_versions.get(namespace) == version and versions[namespace] == version + 1:
+            search_versions[namespace] = versions[namespace]
+    # Cached answers and itineraries may describe the old catalog
+    response_cache.clear()
+    itinerary_cache.clear()
+
+# Keyset pagination shared by the list routes. The next page's cursor goes out in
+# X-Next-Cursor so the body stays a plain list; stream=true switches to NDJSON.
+# Pages are encoded once and returned directly, so the route's response_model is
+# documentation only. Catalog collections (request given) are served from
+# catalog_cache as pre-serialized JSON with an ETag tied to the collection version.
+async def list_documents(collection, query: dict, model, limit: Optional[int], after: Optional[str],
+                         stream: bool, field: str = "created_at", descending: bool = False,
+                         projection: Optional[dict] = None, request: Optional[Request] = None):
+    if after:
+        try:
+            decode_cursor(after)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    decode = lambda doc: from_mongo(model, doc)
+    if stream:
+        return StreamingResponse(
+            stream_ndjson(collection, query, field, decode, after=after, descending=descending, limit=limit,
+                          projection=projection),
+            media_type="application/x-ndjson"
+        )
+    
+    async def load_page():
+        docs, next_cursor = await fetch_page(
+            collection, query, field, limit or DEFAULT_PAGE_LIMIT, after=after, descending=descending,
+            projection=projection
+        )
+        items = [decode(doc) for doc in docs]
+        return {"items": jsonable_encoder(items, exclude_unset=projection is not None), "next": next_cursor}
+    
+    if request is None:
+        page = await load_page()
+        headers = {"X-Next-Cursor": page["next"]} if page["next"] else {}
+        return JSONResponse(page["items"], headers=headers)
+    
+    async def load_body():
+        page = await load_page()
+        return {"body": dumps(page["items"]), "next": page["next"]}
+    
+    namespace = collection.name
+    key = cache_key(
+        "list", query=json.dumps(query, sort_keys=True, default=str), limit=limit, after=after,
+        fields=",".join(sorted(projection)) if projection else None, sort=f"{'-' if descending else ''}{field}"
+    )
+    version = await catalog_cache.version(namespace)
+    etag = make_etag(namespace, version, key)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    
+    page = await catalog_cache.get_or_load(namespace, key, load_body, version=version)
+    headers = {"X-Next-Cursor": page["next"]} if page["next"] else {}
+    return cached_json_response(request, etag, page["body"], headers)
+
+# Sparse fieldsets: `fields=name,location` becomes a Mongo projection. Only fields
+# of the summary model may be requested; images and image_variants are cut to the first one.
+def sparse_projection(fields: Optional[str], summary_model) -> Optional[dict]:
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(summary_model.model_fields))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
+    projection = {"_id": 0, "id": 1, "created_at": 1}
+    for f in requested:
+        projection[f] = {"$slice": 1} if f in ("images", "image_variants") else 1
+    return projection
+
+# "Near me": documents within radius_km of a point, nearest first, with their
+# distance. $geoNear walks the 2dsphere index; the grid index is the fallback.
+async def find_nearby(collection, model, lat: float, lng: float, radius_km: float,
+                      query: dict, limit: int, offset: int):
+    decode = codec_for(model).decode
+    if GEO_BACKEND != "grid":
+        try:
+            docs = await collection.aggregate([
+                {"$geoNear": {
+                    "near": {"type": "Point", "coordinates": [lng, lat]},
+                    "distanceField": "distance_m",
+                    "maxDistance": radius_km * 1000,
+                    "spherical": True,
+                    "query": query,
+                }},
+                {"$skip": offset},
+                {"$limit": limit},
+                {"$project": {"_id": 0}},
+            ]).to_list(limit)
+            return [
+                model(**decode(doc), distance_km=round(doc.pop("distance_m") / 1000, 3))
+                for doc in docs
+            ]
+        except (NotImplementedError, OperationFailure) as e:
+            logger.warning("$geoNear unavailable on %s, using grid index: %s", collection.name, e)
+    
+    await refresh_search_index(collection.name)
+    hits = geo_index.nearby(collection.name, lat, lng, radius_km, offset + limit, category=query.get("category"))
+    hits = hits[offset:]
+    if not hits:
+        return []
+    docs = await collection.find({"id": {"$in": [doc_id for _, doc_id in hits]}, **query}, {"_id": 0}).to_list(None)
+    by_id = {doc["id"]: doc for doc in docs}
+    return [
+        model(**decode(by_id[doc_id]), distance_km=round(distance, 3))
+        for distance, doc_id in hits if doc_id in by_id
+    ]
 
 # Define Models
+class ImageVariant(BaseModel):
+    url: str
+    width: int
+    height: int
+
+class ResponsiveImage(BaseModel):
+    src: str
+    width: int
+    height: int
+    variants: Dict[str, ImageVariant]  # thumb, medium, large
+
 class Destination(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -53,6 +282,7 @@ class Destination(BaseModel):
     location: str
     category: str  # eco, cultural, adventure, festivals
     images: List[str] = []
+    image_variants: List[ResponsiveImage] = []
     latitude: Optional[float] = None
     longitude: Optional[float] = None
     best_time_to_visit: str
@@ -62,6 +292,22 @@ class Destination(BaseModel):
     cultural_significance: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+class DestinationSummary(BaseModel):
+    id: str
+    name: Optional[str] = None
+    location: Optional[str] = None
+    category: Optional[str] = None
+    images: List[str] = []
+    image_variants: List[ResponsiveImage] = []
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    best_time_to_visit: Optional[str] = None
+    entry_fee: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class DestinationNearby(Destination):
+    distance_km: float
+
 class DestinationCreate(BaseModel):
     name: str
     description: str
@@ -76,6 +322,11 @@ class DestinationCreate(BaseModel):
     eco_tips: List[str] = []
     cultural_significance: Optional[str] = None
 
+class ItineraryDay(BaseModel):
+    day: int
+    stops: List[str]
+    distance_km: float
+
 class Itinerary(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_name: str
@@ -87,11 +338,17 @@ class Itinerary(BaseModel):
     accommodation_suggestions: List[str]
     transport_suggestions: List[str]
     total_cost_estimate: Optional[str] = None
+    day_plans: List[ItineraryDay] = []
+    total_distance_km: Optional[float] = None
+    narrative: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+MAX_ITINERARY_DAYS = 30
+
 class ItineraryRequest(BaseModel):
     user_name: str
-    days: int
+    # The planner works day by day on the event loop, so the length is capped
+    days: int = Field(..., ge=1, le=MAX_ITINERARY_DAYS)
     interests: List[str]
     budget: str
     special_requirements: Optional[str] = None
@@ -107,9 +364,24 @@ class LocalGuide(BaseModel):
     languages: List[str] = []
     description: str
     price_per_day: str
+    # Parsed from price_per_day so guides can be filtered and sorted by price
+    price_min: Optional[int] = None
+    price_max: Optional[int] = None
     availability: List[str] = []
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    @model_validator(mode="after")
+    def derive_search_fields(self):
+        self.price_min, self.price_max = parse_price_range(self.price_per_day)
+        self.languages = normalize_languages(self.languages)
+        self.availability = normalize_days(self.availability)
+        return self
+
+class GuideNearby(LocalGuide):
+    distance_km: float
+
 class LocalGuideCreate(BaseModel):
     name: str
     specialization: str
@@ -119,6 +391,8 @@ class LocalGuideCreate(BaseModel):
     description: str
     price_per_day: str
     availability: List[str] = []
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class Event(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -127,22 +401,78 @@ class Event(BaseModel):
     location: str
     date: str
     category: str  # festival, fair, cultural
+    # First and last day (midnight UTC); parsed from `date` when not given
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    # "yearly" repeats the same Gregorian dates, so it only suits fixed-date events.
+    # Lunar festivals such as Karma and Sarhul move every year; list the first
+    # day of each later year's celebration in `occurrences` instead.
+    recurrence: Optional[str] = None
+    occurrences: List[datetime] = []  # further first days, each as long as start..end
     images: List[str] = []
+    image_variants: List[ResponsiveImage] = []
     registration_required: bool = False
     registration_link: Optional[str] = None
     cultural_significance: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
+    @model_validator(mode="after")
+    def derive_dates(self):
+        if self.start_date is None:
+            self.start_date, parsed_end = parse_event_dates(self.date)
+            self.end_date = self.end_date or parsed_end
+        if self.start_date is None:
+            self.end_date = None
+        else:
+            self.start_date = day_start(self.start_date)
+            self.end_date = day_start(self.end_date or self.start_date)
+            if self.end_date < self.start_date:
+                raise ValueError("end_date is before start_date")
+            if (self.end_date - self.start_date).days >= MAX_EVENT_DAYS:
+                raise ValueError(f"Events may span at most {MAX_EVENT_DAYS} days")
+        if self.recurrence is not None and self.recurrence not in RECURRENCES:
+            raise ValueError(f"recurrence must be one of: {', '.join(RECURRENCES)}")
+        if self.occurrences and self.start_date is None:
+            raise ValueError("occurrences need a start_date")
+        self.occurrences = sorted({day_start(day) for day in self.occurrences} - {self.start_date})
+        return self
+
+class EventSummary(BaseModel):
+    id: str
+    name: Optional[str] = None
+    location: Optional[str] = None
+    date: Optional[str] = None
+    category: Optional[str] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    recurrence: Optional[str] = None
+    occurrences: List[datetime] = []
+    images: List[str] = []
+    image_variants: List[ResponsiveImage] = []
+    registration_required: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+class EventNearby(Event):
+    distance_km: float
+
 class EventCreate(BaseModel):
     name: str
     description: str
     location: str
     date: str
     category: str
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    recurrence: Optional[str] = None
+    occurrences: List[datetime] = []
     images: List[str] = []
     registration_required: bool = False
     registration_link: Optional[str] = None
     cultural_significance: Optional[str] = None
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
 
 class ChatMessage(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -160,12 +490,12 @@ class SearchQuery(BaseModel):
     category: Optional[str] = None
 
 # Initialize LLM Chat
-def get_llm_chat(session_id: str):
+def get_llm_chat(session_id: str, context: str = ""):
     api_key = os.environ.get('EMERGENT_LLM_KEY')
-    if not api_key:
+    if not api_key and LLM_BACKEND != "fake":
         raise HTTPException(status_code=500, detail="LLM API key not configured")
     
-    return LlmChat(
+    return create_chat(
         api_key=api_key,
         session_id=session_id,
         system_message="""You are Jharkhand Tourism Assistant, an expert guide for eco-tourism and cultural tourism in Jharkhand, India. 
@@ -179,8 +509,116 @@ def get_llm_chat(session_id: str):
         
         Always provide helpful, accurate information about Jharkhand tourism. Suggest specific places, activities, and experiences. 
         Be enthusiastic about promoting responsible and sustainable tourism that benefits local communities."""
+        + (f"\n\n{context}" if context else "")
     ).with_model("anthropic", "claude-3-7-sonnet-20250219")
 
+# Chat messages are written behind the response, batched with insert_many
+chat_writer = WriteBehindBuffer(
+    db.chat_messages,
+    max_batch=int(os.environ.get('CHAT_WRITE_BATCH', '100')),
+    flush_interval=float(os.environ.get('CHAT_WRITE_INTERVAL', '0.5')),
+    max_queue=int(os.environ.get('CHAT_WRITE_MAX_QUEUE', '10000')),
+    put_timeout=float(os.environ.get('CHAT_WRITE_PUT_TIMEOUT', '2'))
+)
+
+def chat_storage_unavailable() -> HTTPException:
+    # The buffer is full because the database is not keeping up; a reply we
+    # could not store is not acknowledged
+    return HTTPException(status_code=503, detail="Chat storage is unavailable, try again shortly",
+                         headers={"Retry-After": str(max(1, round(chat_writer.put_timeout)))})
+
+async def flush_session_writes(session_id: str):
+    await chat_writer.flush_matching(lambda doc: doc["session_id"] == session_id)
+
+# Assistant context is the last CHAT_CONTEXT_TURNS turns plus a stored rolling
+# summary of older ones, given to a client when it is built. A client remembers
+# the turns it serves itself, so the pool replaces it after that many turns and
+# the prompt stays bounded however long the session runs.
+CHAT_CONTEXT_TURNS = int(os.environ.get('CHAT_CONTEXT_TURNS', '6'))
+CHAT_LLM_SUMMARY = os.environ.get('CHAT_LLM_SUMMARY', 'false').lower() in ('1', 'true', 'yes')
+
+# Warm chat clients reused per session, with a cap on concurrent provider calls.
+# The provider SDK owns its HTTP connections; keeping the client alive keeps them.
+chat_pool = ChatClientPool(
+    get_llm_chat,
+    max_sessions=int(os.environ.get('LLM_POOL_MAX_SESSIONS', '1000')),
+    idle_ttl=float(os.environ.get('LLM_POOL_IDLE_TTL', '900')),
+    max_concurrency=int(os.environ.get('LLM_MAX_CONCURRENCY', '16')),
+    max_uses=CHAT_CONTEXT_TURNS
+)
+
+# Admission control in front of the LLM routes: a per-session (per-client for
+# itineraries) token bucket answers 429, and a bounded slot pool with a short
+# queue answers 503 once the provider is saturated, both with Retry-After, so
+# spikes are shed early instead of piling up behind the pool's semaphore.
+chat_admission = AdmissionController(
+    "chat",
+    max_concurrency=int(os.environ.get('CHAT_MAX_CONCURRENCY', '12')),
+    max_queue=int(os.environ.get('CHAT_MAX_QUEUE', '32')),
+    queue_timeout=float(os.environ.get('CHAT_QUEUE_TIMEOUT', '2')),
+    rate=float(os.environ.get('CHAT_SESSION_RATE', '0.5')),
+    burst=float(os.environ.get('CHAT_SESSION_BURST', '5'))
+)
+itinerary_admission = AdmissionController(
+    "itinerary",
+    max_concurrency=int(os.environ.get('ITINERARY_MAX_CONCURRENCY', '4')),
+    max_queue=int(os.environ.get('ITINERARY_MAX_QUEUE', '16')),
+    queue_timeout=float(os.environ.get('ITINERARY_QUEUE_TIMEOUT', '5')),
+    rate=float(os.environ.get('ITINERARY_CLIENT_RATE', '0.2')),
+    burst=float(os.environ.get('ITINERARY_CLIENT_BURST', '3'))
+)
+
+# Reverse proxies in front of the app; the client is the address the outermost
+# one of them saw, i.e. that many entries from the right of X-Forwarded-For
+TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS', '1'))
+
+def client_identity(request: Request) -> str:
+    forwarded = [a.strip() for a in request.headers.get("x-forwarded-for", "").split(",") if a.strip()]
+    if TRUSTED_PROXY_HOPS and forwarded:
+        return forwarded[-min(TRUSTED_PROXY_HOPS, len(forwarded))]
+    return request.client.host if request.client else "unknown"
+
+async def send_timed(operation: str, chat, prompt: str) -> str:
+    started = time.perf_counter()
+    try:
+        reply = await chat.send_message(UserMessage(text=prompt))
+    except Exception:
+        LLM_FAILURES.inc(operation)
+        raise
+    observe_llm(operation, time.perf_counter() - started, prompt, reply)
+    return reply
+
+async def summarize_turns(summary: str, turns):
+    prompt = f"""Update this running summary of a travel-assistant conversation with the new exchanges.
+    Keep places, dates, preferences and open questions; stay under 120 words.
+    
+    {format_context(summary, turns)}"""
+    # A throwaway session so the summary call carries no history of its own
+    chat = get_llm_chat(f"summary_{uuid.uuid4()}")
+    return await send_timed("summary", chat, prompt)
+
+chat_contexts = ChatContextStore(
+    db.chat_sessions,
+    db.chat_messages,
+    window=CHAT_CONTEXT_TURNS,
+    summarizer=summarize_turns if CHAT_LLM_SUMMARY else None,
+    # This session's pending writes must land before it reads its recent turns
+    before_load=flush_session_writes
+)
+
+async def use_response_cache(session_id: str) -> bool:
+    # Cached answers carry no conversation, so only a session's opening question
+    # may be served from (or stored into) the shared cache
+    return chat_pool.needs_client(session_id) and not await chat_contexts.has_history(session_id)
+
+@asynccontextmanager
+async def assistant_session(session_id: str, admission=None):
+    context = ""
+    if chat_pool.needs_client(session_id):
+        context = await chat_contexts.context(session_id)
+    async with chat_pool.session(session_id, admission=admission, context=context) as chat:
+        yield chat
+
 # Seed data
 SAMPLE_DESTINATIONS = [
     {
@@ -253,11 +691,14 @@ SAMPLE_EVENTS = [
         "description": "Annual fair showcasing authentic Jharkhand handicrafts including pottery, tribal art, and bamboo crafts",
         "location": "Ranchi Cultural Center",
         "date": "2025-10-15",
+        "end_date": "2025-10-19",
         "category": "fair",
         "images": ["/images/cultural_heritage_2.png", "/images/cultural_heritage_5.png"],
         "registration_required": True,
         "registration_link": "https://jharkhandtourism.com/handicrafts-fair",
-        "cultural_significance": "Promotes local artisan communities and preserves traditional craft techniques"
+        "cultural_significance": "Promotes local artisan communities and preserves traditional craft techniques",
+        "latitude": 23.3441,
+        "longitude": 85.3096
     },
     {
         "name": "Sohrai Art Festival",
@@ -267,7 +708,9 @@ SAMPLE_EVENTS = [
         "category": "cultural",
         "images": ["/images/cultural_heritage_3.png"],
         "registration_required": False,
-        "cultural_significance": "Ancient art form practiced by tribal women, recognized by UNESCO"
+        "cultural_significance": "Ancient art form practiced by tribal women, recognized by UNESCO",
+        "latitude": 23.9925,
+        "longitude": 85.3637
     }
 ]
 
@@ -282,7 +725,9 @@ SAMPLE_GUIDES = [
         "languages": ["Hindi", "English", "Mundari"],
         "description": "Expert guide with 15 years experience in tribal culture and traditional crafts",
         "price_per_day": "₹2000-3000",
-        "availability": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+        "availability": ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat"],
+        "latitude": 23.3441,
+        "longitude": 85.3096
     },
     {
         "name": "Sunita Oraon",
@@ -294,7 +739,9 @@ SAMPLE_GUIDES = [
         "languages": ["Hindi", "English", "Oraon"],
         "description": "Wildlife expert and eco-tourism specialist with deep forest knowledge",
         "price_per_day": "₹2500-3500",
-        "availability": ["Mon", "Wed", "Fri", "Sat", "Sun"]
+        "availability": ["Mon", "Wed", "Fri", "Sat", "Sun"],
+        "latitude": 23.9167,
+        "longitude": 84.1833
     }
 ]
 
@@ -306,121 +753,376 @@ async def root():
 # Destinations Routes
 @api_router.post("/destinations", response_model=Destination)
 async def create_destination(destination: DestinationCreate):
-    dest_dict = prepare_for_mongo(destination.dict())
-    dest_obj = Destination(**dest_dict)
-    await db.destinations.insert_one(prepare_for_mongo(dest_obj.dict()))
+    dest_obj = await prepare_new_media(Destination(**destination.dict()))
+    await db.destinations.insert_one(to_mongo(dest_obj))
+    index_documents("destinations", [dest_obj.dict()])
+    await catalog_changed("destinations", indexed=True)
     return dest_obj
 
 @api_router.get("/destinations", response_model=List[Destination])
-async def get_destinations(category: Optional[str] = None):
+async def get_destinations(
+    request: Request,
+    category: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    stream: bool = False
+):
     query = {}
     if category:
         query["category"] = category
     
-    destinations = await db.destinations.find(query).to_list(1000)
-    return [Destination(**parse_from_mongo(dest)) for dest in destinations]
+    projection = sparse_projection(fields, DestinationSummary)
+    return await list_documents(
+        db.destinations, query, DestinationSummary if projection else Destination, limit, after, stream,
+        projection=projection, request=request
+    )
+
+@api_router.get("/destinations/nearby", response_model=List[DestinationNearby])
+async def get_nearby_destinations(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(25.0, gt=0, le=500),
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000)
+):
+    query = {"category": category} if category else {}
+    return await find_nearby(db.destinations, DestinationNearby, lat, lng, radius_km, query, limit, offset)
 
 @api_router.get("/destinations/{destination_id}", response_model=Destination)
-async def get_destination(destination_id: str):
-    destination = await db.destinations.find_one({"id": destination_id})
+async def get_destination(request: Request, destination_id: str):
+    key = cache_key("detail", id=destination_id)
+    version = await catalog_cache.version("destinations")
+    etag = make_etag("destinations", version, key)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    
+    async def load():
+        destination = await db.destinations.find_one({"id": destination_id})
+        return {"body": dumps(jsonable_encoder(from_mongo(Destination, destination)))} if destination else None
+    
+    destination = await catalog_cache.get_or_load("destinations", key, load, version=version)
     if not destination:
         raise HTTPException(status_code=404, detail="Destination not found")
-    return Destination(**parse_from_mongo(destination))
+    return cached_json_response(request, etag, destination["body"])
 
 # Itinerary Routes
+# Plans come from the local geo planner: destinations matching the interests,
+# ordered by nearest-neighbour + 2-opt over haversine distances and split into
+# days. The LLM only writes optional narrative text. Plans depend on the
+# canonicalized request and the catalog, so identical requests share one
+# cached generation until the catalog changes.
+itinerary_cache = SingleFlightCache(
+    ttl=float(os.environ.get('ITINERARY_CACHE_TTL', '86400')),
+    max_entries=int(os.environ.get('ITINERARY_CACHE_MAX_ENTRIES', '2048'))
+)
+
+ITINERARY_LLM_NARRATIVE = os.environ.get('ITINERARY_LLM_NARRATIVE', 'false').lower() in ('1', 'true', 'yes')
+
+# Located destinations, tokenized once per catalog version for the planner
+planner_catalog = {"version": None, "destinations": []}
+
+async def get_planner_catalog():
+    version = await catalog_cache.version("destinations")
+    if planner_catalog["version"] != version:
+        projection = {"_id": 0, "name": 1, "location": 1, "category": 1, "description": 1,
+                      "cultural_significance": 1, "latitude": 1, "longitude": 1}
+        docs = await db.destinations.find({"latitude": {"$ne": None}}, projection).to_list(None)
+        planner_catalog.update(version=version, destinations=prepare_catalog(docs))
+    return planner_catalog["destinations"]
+
+async def itinerary_narrative(request: ItineraryRequest, route: dict, key: str):
+    days = "\n".join(f"Day {d['day']}: {', '.join(d['stops']) or 'Rest day'}" for d in route["days"])
+    prompt = f"""Write a short, practical day-wise narrative for this {request.days}-day Jharkhand itinerary.
+    
+    Interests: {', '.join(request.interests)}
+    Budget: {request.budget}
+    Special Requirements: {request.special_requirements or 'None'}
+    
+    {days}
+    
+    Focus on eco-tourism and cultural experiences, and keep the stops in the given order."""
+    
+    try:
+        async with itinerary_admission.slot(), chat_pool.session(f"itinerary_{key[:16]}") as chat:
+            return await send_timed("itinerary", chat, prompt)
+    except AdmissionRejected:
+        # Shed rather than cache a plan that is missing its narrative
+        raise
+    except Exception as e:
+        logger.warning("Itinerary narrative failed, returning plan without it: %s", e)
+        return None
+
+async def generate_itinerary_plan(request: ItineraryRequest, key: str):
+    catalog = await get_planner_catalog()
+    route = plan_route(catalog, request.interests, request.days)
+    
+    locations = []
+    by_name = {d["name"]: d for d in catalog}
+    for name in route["destinations"]:
+        location = by_name[name].get("location")
+        if location and location not in locations:
+            locations.append(location)
+    
+    distance = route["total_distance_km"]
+    transport = ["Local taxi", "Auto-rickshaw for short hops"] if distance < 150 else [
+        f"Private vehicle with driver for the {distance:.0f} km circuit",
+        "Government bus between district towns"
+    ]
+    
+    return {
+        "destinations": route["destinations"],
+        "activities": [
+            f"Day {d['day']}: {' → '.join(d['stops']) or 'Rest and explore locally'} ({d['distance_km']} km)"
+            for d in route["days"]
+        ],
+        "accommodation_suggestions": [f"Eco-lodge or tribal homestay near {loc}" for loc in locations] or [
+            "Eco-lodge", "Tribal homestay", "Budget hotel"
+        ],
+        "transport_suggestions": transport,
+        "day_plans": route["days"],
+        "total_distance_km": distance,
+        "narrative": await itinerary_narrative(request, route, key) if ITINERARY_LLM_NARRATIVE else None
+    }
+
 @api_router.post("/itinerary/generate", response_model=Itinerary)
-async def generate_itinerary(request: ItineraryRequest):
+async def generate_itinerary(request: ItineraryRequest, http_request: Request):
+    key = request_key(canonical_itinerary_request(
+        request.days, request.interests, request.budget, request.special_requirements
+    ))
+    # Only a plan that will call the provider for its narrative is rate limited;
+    # local plans and cached or in-flight ones cost next to nothing
+    if ITINERARY_LLM_NARRATIVE and not itinerary_cache.has(key):
+        itinerary_admission.throttle(client_identity(http_request))
     try:
-        chat = get_llm_chat(f"itinerary_{request.user_name}")
+        plan, _ = await itinerary_cache.get_or_create(key, lambda: generate_itinerary_plan(request, key))
         
-        prompt = f"""Generate a detailed {request.days}-day itinerary for Jharkhand tourism.
-        
-        User Details:
-        - Name: {request.user_name}
-        - Days: {request.days}
-        - Interests: {', '.join(request.interests)}
-        - Budget: {request.budget}
-        - Special Requirements: {request.special_requirements or 'None'}
-        
-        Please provide:
-        1. List of destinations to visit (specific names)
-        2. Daily activities
-        3. Accommodation suggestions
-        4. Transportation recommendations
-        5. Cost estimates
-        
-        Focus on eco-tourism and cultural experiences. Include tribal villages, waterfalls, wildlife sanctuaries, and cultural sites.
-        Format the response as a practical, day-wise itinerary."""
-        
-        user_message = UserMessage(text=prompt)
-        response = await chat.send_message(user_message)
-        
-        # Parse AI response to create structured itinerary
         itinerary = Itinerary(
             user_name=request.user_name,
             days=request.days,
             interests=request.interests,
             budget=request.budget,
-            destinations=["Hundru Falls", "Betla National Park", "Tribal Museum"],  # Would parse from AI response
-            activities=["Waterfall trekking", "Wildlife safari", "Cultural tour"],
-            accommodation_suggestions=["Eco-lodge", "Tribal homestay", "Budget hotel"],
-            transport_suggestions=["Local taxi", "Government bus", "Private vehicle"],
-            total_cost_estimate=request.budget
+            total_cost_estimate=request.budget,
+            **plan
         )
         
-        await db.itineraries.insert_one(prepare_for_mongo(itinerary.dict()))
+        await db.itineraries.insert_one(to_mongo(itinerary))
         return itinerary
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate itinerary: {str(e)}")
 
 @api_router.get("/itineraries", response_model=List[Itinerary])
-async def get_itineraries():
-    itineraries = await db.itineraries.find().to_list(1000)
-    return [Itinerary(**parse_from_mongo(itinerary)) for itinerary in itineraries]
+async def get_itineraries(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    stream: bool = False
+):
+    return await list_documents(db.itineraries, {}, Itinerary, limit, after, stream)
 
 # Local Guides Routes
 @api_router.post("/guides", response_model=LocalGuide)
 async def create_guide(guide: LocalGuideCreate):
-    guide_dict = prepare_for_mongo(guide.dict())
-    guide_obj = LocalGuide(**guide_dict)
-    await db.guides.insert_one(prepare_for_mongo(guide_obj.dict()))
+    guide_obj = LocalGuide(**guide.dict())
+    await db.guides.insert_one(to_mongo(guide_obj))
+    index_documents("guides", [guide_obj.dict()])
+    await catalog_changed("guides", indexed=True)
     return guide_obj
 
+# `languages` and `availability` are comma-separated; sort by created_at, rating
+# or price, descending with a leading "-". The cursor only fits the same sort.
 @api_router.get("/guides", response_model=List[LocalGuide])
-async def get_guides(location: Optional[str] = None, specialization: Optional[str] = None):
-    query = {}
-    if location:
-        query["location"] = location
-    if specialization:
-        query["specialization"] = {"$regex": specialization, "$options": "i"}
+async def get_guides(
+    request: Request,
+    location: Optional[str] = None,
+    specialization: Optional[str] = None,
+    min_price: Optional[int] = Query(None, ge=0),
+    max_price: Optional[int] = Query(None, ge=0),
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    languages: Optional[str] = None,
+    availability: Optional[str] = None,
+    sort: str = Query("created_at", pattern="^-?(created_at|rating|price)$"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    stream: bool = False
+):
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="min_price is greater than max_price")
+    field, descending = parse_sort(sort)
+    query = guide_query(
+        location, specialization, min_price, max_price, min_rating,
+        split_list(languages), split_list(availability), sort_field=field
+    )
     
-    guides = await db.guides.find(query).to_list(1000)
-    return [LocalGuide(**parse_from_mongo(guide)) for guide in guides]
+    return await list_documents(
+        db.guides, query, LocalGuide, limit, after, stream, field=field, descending=descending, request=request
+    )
+
+@api_router.get("/guides/nearby", response_model=List[GuideNearby])
+async def get_nearby_guides(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(25.0, gt=0, le=500),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000)
+):
+    return await find_nearby(db.guides, GuideNearby, lat, lng, radius_km, {}, limit, offset)
 
 # Events Routes
+# Event calendar: one row per occurrence in event_occurrences, carrying the
+# months it touches, so date ranges and month views are single index scans.
+# Yearly (fixed-date) events are expanded through EVENT_RECURRENCE_YEARS past the
+# current year; lunar festivals carry their later dates in `occurrences`.
+EVENT_RECURRENCE_YEARS = int(os.environ.get('EVENT_RECURRENCE_YEARS', '2'))
+DAY_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+EVENT_CALENDAR_FIELDS = {"_id": 0, "id": 1, "name": 1, "location": 1, "category": 1,
+                         "start_date": 1, "end_date": 1, "recurrence": 1, "occurrences": 1}
+
+async def sync_event_calendar(events: List[dict]):
+    until_year = datetime.now(timezone.utc).year + EVENT_RECURRENCE_YEARS
+    await sync_occurrences(db.event_occurrences, events, until_year)
+
+async def rebuild_event_calendar():
+    await db.event_occurrences.delete_many({})
+    events = await db.events.find({"start_date": {"$ne": None}}, EVENT_CALENDAR_FIELDS).to_list(None)
+    await sync_event_calendar(events)
+
 @api_router.post("/events", response_model=Event)
 async def create_event(event: EventCreate):
-    event_dict = prepare_for_mongo(event.dict())
-    event_obj = Event(**event_dict)
-    await db.events.insert_one(prepare_for_mongo(event_obj.dict()))
+    try:
+        event_obj = Event(**event.dict())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False, include_context=False))
+    event_obj = await prepare_new_media(event_obj)
+    await db.events.insert_one(to_mongo(event_obj))
+    index_documents("events", [event_obj.dict()])
+    await sync_event_calendar([event_obj.dict()])
+    await catalog_changed("events", indexed=True)
     return event_obj
 
+# Events running at any point between `from` and `to` (inclusive, either may be
+# omitted), one entry per occurrence in date order with occurrence_start/_end
+async def list_event_occurrences(request: Request, start: Optional[datetime], end: Optional[datetime],
+                                 category: Optional[str], projection: Optional[dict],
+                                 limit: Optional[int], after: Optional[str]):
+    if after:
+        try:
+            decode_cursor(after)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    query = occurrence_query(start, end, category)
+    model = EventSummary if projection else Event
+    
+    async def load_body():
+        rows, next_cursor = await fetch_page(
+            db.event_occurrences, query, "start", limit or DEFAULT_PAGE_LIMIT, after=after,
+            projection={"_id": 0, "id": 1, "event_id": 1, "start": 1, "end": 1}
+        )
+        ids = list({row["event_id"] for row in rows})
+        docs = await db.events.find({"id": {"$in": ids}}, projection).to_list(len(ids))
+        by_id = {doc["id"]: from_mongo(model, doc) for doc in docs}
+        items = []
+        for row in rows:
+            event = by_id.get(row["event_id"])
+            if event is not None:
+                item = jsonable_encoder(event, exclude_unset=projection is not None)
+                item["occurrence_start"], item["occurrence_end"] = day_string(row["start"]), day_string(row["end"])
+                items.append(item)
+        return {"body": dumps(items), "next": next_cursor}
+    
+    key = cache_key(
+        "occurrences", query=json.dumps(query, sort_keys=True, default=str), limit=limit, after=after,
+        fields=",".join(sorted(projection)) if projection else None
+    )
+    version = await catalog_cache.version("events")
+    etag = make_etag("events", version, key)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    
+    page = await catalog_cache.get_or_load("events", key, load_body, version=version)
+    headers = {"X-Next-Cursor": page["next"]} if page["next"] else {}
+    return cached_json_response(request, etag, page["body"], headers)
+
 @api_router.get("/events", response_model=List[Event])
-async def get_events(category: Optional[str] = None):
+async def get_events(
+    request: Request,
+    category: Optional[str] = None,
+    fields: Optional[str] = None,
+    from_: Optional[str] = Query(None, alias="from", pattern=DAY_PATTERN),
+    to: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    stream: bool = False
+):
+    projection = sparse_projection(fields, EventSummary)
+    if from_ or to:
+        if stream:
+            raise HTTPException(status_code=400, detail="stream is not supported with from/to")
+        try:
+            start = day_start(from_) if from_ else None
+            end = day_start(to) if to else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid date: {e}")
+        if start and end and start > end:
+            raise HTTPException(status_code=400, detail="from is after to")
+        return await list_event_occurrences(request, start, end, category, projection, limit, after)
+    
     query = {}
     if category:
         query["category"] = category
     
-    events = await db.events.find(query).to_list(1000)
-    return [Event(**parse_from_mongo(event)) for event in events]
+    return await list_documents(
+        db.events, query, EventSummary if projection else Event, limit, after, stream,
+        projection=projection, request=request
+    )
+
+# Month view, precomputed: the occurrence rows tagged with the month, in date order
+@api_router.get("/events/calendar/{month}")
+async def get_event_calendar(request: Request, month: str, category: Optional[str] = None):
+    try:
+        month = datetime.strptime(month, "%Y-%m").strftime("%Y-%m")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="month must be YYYY-MM")
+    
+    key = cache_key("calendar", month=month, category=category)
+    version = await catalog_cache.version("events")
+    etag = make_etag("events", version, key)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    
+    async def load():
+        query = {"months": month, **({"category": category} if category else {})}
+        rows = await db.event_occurrences.find(query, {"_id": 0, "id": 0, "months": 0}).sort(
+            [("start", 1), ("id", 1)]
+        ).to_list(None)
+        for row in rows:
+            row["start"], row["end"] = day_string(row["start"]), day_string(row["end"])
+        return {"body": dumps({"month": month, "events": rows})}
+    
+    calendar = await catalog_cache.get_or_load("events", key, load, version=version)
+    return cached_json_response(request, etag, calendar["body"])
+
+@api_router.get("/events/nearby", response_model=List[EventNearby])
+async def get_nearby_events(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(25.0, gt=0, le=500),
+    category: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000)
+):
+    query = {"category": category} if category else {}
+    return await find_nearby(db.events, EventNearby, lat, lng, radius_km, query, limit, offset)
 
 # Chat Routes
 @api_router.post("/chat", response_model=Dict[str, Any])
 async def chat_with_assistant(request: ChatRequest):
+    chat_admission.throttle(request.session_id)
     try:
-        chat = get_llm_chat(request.session_id)
-        
         # Store user message
         user_msg = ChatMessage(
             session_id=request.session_id,
@@ -428,121 +1130,482 @@ async def chat_with_assistant(request: ChatRequest):
             bot_response=""
         )
         
-        user_message = UserMessage(text=request.message)
-        response = await chat.send_message(user_message)
+        if chat_writer.full:
+            raise chat_storage_unavailable()
+        use_cache = await use_response_cache(request.session_id)
+        response = response_cache.lookup(request.message) if use_cache else None
+        cached = response is not None
+        if not cached:
+            async with assistant_session(request.session_id, admission=chat_admission.slot()) as chat:
+                response = await send_timed("chat", chat, request.message)
+            if use_cache:
+                response_cache.store(request.message, response)
+        await chat_contexts.record(request.session_id, request.message, response)
         
         # Update with bot response
         user_msg.bot_response = response
         
-        await db.chat_messages.insert_one(prepare_for_mongo(user_msg.dict()))
+        await chat_writer.put(to_mongo(user_msg))
         
         return {
             "response": response,
-            "session_id": request.session_id
+            "session_id": request.session_id,
+            "cached": cached
         }
         
+    except HTTPException:
+        raise
+    except WriteBufferFull:
+        raise chat_storage_unavailable()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
+# Server-Sent Events: one `token` event per chunk, then `done` once the
+# exchange is persisted, or `error` if the provider fails mid-stream
+def sse_event(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode("utf-8")
+
+@api_router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """Stream the assistant's reply as Server-Sent Events.
+
+    Tokens arrive incrementally only with a client that exposes
+    ``stream_message`` (the offline fake backend). The emergentintegrations
+    LlmChat used in production has no streaming API, so there the whole reply
+    comes as a single ``token`` event once the provider has answered: the
+    first byte is no earlier than on /chat.
+    """
+    chat_admission.throttle(request.session_id)
+    if chat_writer.full:
+        raise chat_storage_unavailable()
+    use_cache = await use_response_cache(request.session_id)
+    cached = response_cache.lookup(request.message) if use_cache else None
+    if cached is None:
+        # A full queue still gets a plain 503; the slot itself is taken inside the
+        # stream, after the session lock, and released when the session exits
+        chat_admission.check_capacity()
+    
+    async def events():
+        parts = []
+        try:
+            if cached is not None:
+                parts.append(cached)
+                yield sse_event("token", {"text": cached})
+            else:
+                async with assistant_session(request.session_id, admission=chat_admission.slot()) as chat:
+                    started = time.perf_counter()
+                    first_token = None
+                    try:
+                        async for token in stream_reply(chat, UserMessage(text=request.message)):
+                            if first_token is None:
+                                first_token = time.perf_counter() - started
+                            parts.append(token)
+                            yield sse_event("token", {"text": token})
+                    except Exception:
+                        LLM_FAILURES.inc("chat_stream")
+                        raise
+                    observe_llm("chat_stream", time.perf_counter() - started, request.message, "".join(parts),
+                                first_token_seconds=first_token)
+                if use_cache:
+                    response_cache.store(request.message, "".join(parts))
+            
+            chat_msg = ChatMessage(
+                session_id=request.session_id,
+                user_message=request.message,
+                bot_response="".join(parts)
+            )
+            # Record before queueing the write, as /chat does: a cold load flushes the
+            # buffer and would otherwise read this turn back and append it twice
+            await chat_contexts.record(request.session_id, request.message, chat_msg.bot_response)
+            await chat_writer.put(to_mongo(chat_msg))
+        except AdmissionRejected as e:
+            yield sse_event("error", {"detail": e.detail, "status": e.status_code, "retry_after": e.headers["Retry-After"]})
+            return
+        except WriteBufferFull:
+            e = chat_storage_unavailable()
+            yield sse_event("error", {"detail": e.detail, "status": e.status_code, "retry_after": e.headers["Retry-After"]})
+            return
+        except Exception as e:
+            logger.error("Chat stream failed for %s: %s", request.session_id, e)
+            yield sse_event("error", {"detail": f"Chat failed: {str(e)}"})
+            return
+        
+        yield sse_event("done", {
+            "session_id": request.session_id,
+            "message_id": chat_msg.id,
+            "cached": cached is not None
+        })
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+# Newest first by default; `after` continues from the previous page's X-Next-Cursor
 @api_router.get("/chat/history/{session_id}")
-async def get_chat_history(session_id: str):
-    messages = await db.chat_messages.find({"session_id": session_id}).to_list(1000)
-    return [ChatMessage(**parse_from_mongo(msg)) for msg in messages]
+async def get_chat_history(
+    session_id: str,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_LIMIT),
+    after: Optional[str] = None,
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    stream: bool = False
+):
+    # Read-your-writes: this session's messages still in the write-behind buffer go out first
+    await flush_session_writes(session_id)
+    return await list_documents(
+        db.chat_messages, {"session_id": session_id}, ChatMessage, limit, after, stream,
+        field="timestamp", descending=order == "desc"
+    )
 
 # Search Routes
+SEARCH_MODELS = {
+    "destinations": Destination,
+    "events": Event,
+    "guides": LocalGuide,
+}
+
+async def index_namespace(collection: str):
+    # Read the version first, so a write landing mid-rebuild triggers another one
+    version = await catalog_cache.version(collection)
+    projection = {"_id": 0, "id": 1, "category": 1, "latitude": 1, "longitude": 1}
+    search_index.clear(collection)
+    geo_index.clear(collection)
+    async for doc in db[collection].find({}, {**projection, **{field: 1 for field in SEARCH_FIELDS[collection]}}):
+        search_index.add(collection, doc)
+        geo_index.add(collection, doc)
+    search_versions[collection] = version
+
+async def rebuild_search_index():
+    async with search_rebuild_lock:
+        for collection in SEARCH_FIELDS:
+            await index_namespace(collection)
+    logger.info("Search index built with %d documents, %d located", len(search_index), len(geo_index))
+
+async def refresh_search_index(*collections: str):
+    """Rebuild the collections whose catalog version moved since they were indexed."""
+    for collection in collections or SEARCH_FIELDS:
+        if search_versions.get(collection) == await catalog_cache.version(collection):
+            continue
+        async with search_rebuild_lock:
+            if search_versions.get(collection) != await catalog_cache.version(collection):
+                await index_namespace(collection)
+                logger.info("Search index for %s rebuilt after a change elsewhere", collection)
+
+async def fetch_ranked(collection: str, ids: List[str]):
+    if not ids:
+        return []
+    docs = await db[collection].find({"id": {"$in": ids}}).to_list(len(ids))
+    by_id = {doc["id"]: doc for doc in docs}
+    model = SEARCH_MODELS[collection]
+    return [from_mongo(model, by_id[doc_id]) for doc_id in ids if doc_id in by_id]
+
 @api_router.post("/search")
 async def search_content(query: SearchQuery):
-    search_term = query.query.lower()
-    results = {
-        "destinations": [],
-        "events": [],
-        "guides": []
-    }
-    
-    # Search destinations
-    dest_query = {
-        "$or": [
-            {"name": {"$regex": search_term, "$options": "i"}},
-            {"description": {"$regex": search_term, "$options": "i"}},
-            {"location": {"$regex": search_term, "$options": "i"}}
-        ]
-    }
-    if query.category:
-        dest_query["category"] = query.category
-    
-    destinations = await db.destinations.find(dest_query).to_list(50)
-    results["destinations"] = [Destination(**parse_from_mongo(dest)) for dest in destinations]
-    
-    # Search events
-    event_query = {
-        "$or": [
-            {"name": {"$regex": search_term, "$options": "i"}},
-            {"description": {"$regex": search_term, "$options": "i"}},
-            {"location": {"$regex": search_term, "$options": "i"}}
-        ]
-    }
-    events = await db.events.find(event_query).to_list(50)
-    results["events"] = [Event(**parse_from_mongo(event)) for event in events]
-    
-    # Search guides
-    guide_query = {
-        "$or": [
-            {"name": {"$regex": search_term, "$options": "i"}},
-            {"specialization": {"$regex": search_term, "$options": "i"}},
-            {"location": {"$regex": search_term, "$options": "i"}}
-        ]
-    }
-    guides = await db.guides.find(guide_query).to_list(50)
-    results["guides"] = [LocalGuide(**parse_from_mongo(guide)) for guide in guides]
+    await refresh_search_index()
+    hits = search_index.search(query.query, category=query.category, limit=SEARCH_RESULT_LIMIT)
+    collections = list(hits)
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(fetch_ranked(collection, hits[collection]), SEARCH_COLLECTION_TIMEOUT)
+          for collection in collections),
+        return_exceptions=True
+    )
     
+    # A slow or failing collection yields an empty bucket instead of failing the whole search
+    results = {"partial": False, "incomplete": []}
+    for collection, outcome in zip(collections, outcomes):
+        if isinstance(outcome, BaseException):
+            if isinstance(outcome, asyncio.TimeoutError):
+                logger.warning("Search on %s exceeded %.2fs budget", collection, SEARCH_COLLECTION_TIMEOUT)
+            else:
+                logger.error("Search on %s failed: %s", collection, outcome)
+            results["partial"] = True
+            results["incomplete"].append(collection)
+            results[collection] = []
+        else:
+            results[collection] = outcome
     return results
 
+# Bulk ingest Routes
+# Accept a JSON array or an NDJSON stream (Content-Type: application/x-ndjson),
+# validated and upserted on `id` in chunks; bad items are reported, not fatal.
+async def documents_written(namespace: str, docs: List[dict]):
+    index_documents(namespace, docs)
+    if namespace == "events":
+        await sync_event_calendar(docs)
+
+async def bulk_ingest(request: Request, collection, model, namespace: str):
+    try:
+        report = await ingest(
+            collection, model, iter_request_items(request),
+            on_written=lambda docs: documents_written(namespace, docs),
+            prepare=prepare_media if "image_variants" in model.model_fields else None
+        )
+    except BulkPayloadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Whatever landed went through documents_written
+        await catalog_changed(namespace, indexed=True)
+    return report
+
+@api_router.post("/destinations/bulk")
+async def bulk_create_destinations(request: Request):
+    return await bulk_ingest(request, db.destinations, Destination, "destinations")
+
+@api_router.post("/events/bulk")
+async def bulk_create_events(request: Request):
+    return await bulk_ingest(request, db.events, Event, "events")
+
+@api_router.post("/guides/bulk")
+async def bulk_create_guides(request: Request):
+    return await bulk_ingest(request, db.guides, LocalGuide, "guides")
+
+# Media Routes
+# POST the raw image bytes with their Content-Type; identical uploads share one blob
+@api_router.post("/media")
+async def upload_media(request: Request):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        check_image_type(content_type)
+    except UnsupportedMediaType as e:
+        raise HTTPException(status_code=415, detail=f"{e}; send the raw image bytes with their Content-Type")
+    try:
+        blob, created = await media_store.put_stream(request.stream(), content_type, max_bytes=MEDIA_MAX_BYTES)
+    except MediaTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    return JSONResponse(
+        {"hash": blob.digest, "url": media_url(blob.digest), "size": blob.size,
+         "content_type": blob.content_type, "created": created},
+        status_code=201 if created else 200
+    )
+
+@api_router.api_route("/media/{digest}", methods=["GET", "HEAD"])
+async def get_media(request: Request, digest: str):
+    blob = await media_store.stat(digest) if is_digest(digest) else None
+    if blob is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+    return blob_response(request, media_store, blob)
+
 # Initialize sample data
+async def reseed_collection(collection, model, samples):
+    objs = [model(**data) for data in samples]
+    if "image_variants" in model.model_fields:
+        objs = [await prepare_media(obj) for obj in objs]
+    await collection.delete_many({})
+    await collection.insert_many([to_mongo(obj) for obj in objs])
+
 @api_router.post("/seed-data")
 async def seed_sample_data():
     try:
-        # Clear existing data
-        await db.destinations.delete_many({})
-        await db.events.delete_many({})
-        await db.guides.delete_many({})
-        
-        # Insert sample destinations
-        for dest_data in SAMPLE_DESTINATIONS:
-            dest = Destination(**dest_data)
-            await db.destinations.insert_one(prepare_for_mongo(dest.dict()))
-        
-        # Insert sample events
-        for event_data in SAMPLE_EVENTS:
-            event = Event(**event_data)
-            await db.events.insert_one(prepare_for_mongo(event.dict()))
+        # Clear and reinsert each collection with one batched write
+        await asyncio.gather(
+            reseed_collection(db.destinations, Destination, SAMPLE_DESTINATIONS),
+            reseed_collection(db.events, Event, SAMPLE_EVENTS),
+            reseed_collection(db.guides, LocalGuide, SAMPLE_GUIDES)
+        )
         
-        # Insert sample guides
-        for guide_data in SAMPLE_GUIDES:
-            guide = LocalGuide(**guide_data)
-            await db.guides.insert_one(prepare_for_mongo(guide.dict()))
+        await rebuild_search_index()
+        await rebuild_event_calendar()
+        await catalog_changed("destinations", "events", "guides", indexed=True)
         
         return {"message": "Sample data seeded successfully"}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to seed data: {str(e)}")
 
+# Diagnostics
+# Representative filter/sort for each route, explained against the live planner
+QUERY_SHAPES = {
+    "GET /api/destinations": ("destinations", {"category": "eco"}, [("created_at", 1), ("id", 1)]),
+    "GET /api/destinations/{id}": ("destinations", {"id": ""}, None),
+    "GET /api/events": ("events", {"category": "festival"}, [("created_at", 1), ("id", 1)]),
+    "GET /api/events?from=&to=": ("event_occurrences", occurrence_query(
+        datetime(2025, 8, 1, tzinfo=timezone.utc), datetime(2025, 8, 31, tzinfo=timezone.utc), "festival"
+    ), [("start", 1), ("id", 1)]),
+    "GET /api/events/calendar/{month}": ("event_occurrences", {"months": "2025-08"}, [("start", 1), ("id", 1)]),
+    "GET /api/guides": ("guides", {"location": "Ranchi"}, [("created_at", 1), ("id", 1)]),
+    "GET /api/guides?sort=-rating": ("guides", {"location": "Ranchi", "rating": {"$gte": 4}},
+                                     [("rating", -1), ("id", -1)]),
+    "GET /api/guides?sort=price": ("guides", {"price_min": {"$lte": 3000, "$type": "number"},
+                                              "price_max": {"$gte": 1000}}, [("price_min", 1), ("id", 1)]),
+    "GET /api/guides?languages=": ("guides", {"languages": {"$in": ["Hindi"]}, "availability": {"$all": ["Sat"]}},
+                                   [("rating", -1), ("id", -1)]),
+    "GET /api/itineraries": ("itineraries", {}, [("created_at", 1), ("id", 1)]),
+    "GET /api/chat/history/{session_id}": ("chat_messages", {"session_id": ""}, [("timestamp", -1), ("id", -1)]),
+    "POST /api/search (destinations)": ("destinations", {"id": {"$in": [""]}}, None),
+    "POST /api/search (events)": ("events", {"id": {"$in": [""]}}, None),
+    "POST /api/search (guides)": ("guides", {"id": {"$in": [""]}}, None),
+}
+
+@api_router.get("/admin/query-plans")
+async def get_query_plans():
+    routes = {}
+    for route, (collection, query, sort) in QUERY_SHAPES.items():
+        plan = await explain_query(db, collection, query, sort)
+        routes[route] = {"collection": collection, **plan}
+    return {
+        "ok": not any(plan["collscan"] for plan in routes.values()),
+        "routes": routes
+    }
+
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats():
+    return catalog_cache.stats()
+
+@api_router.get("/admin/admission")
+async def get_admission_stats():
+    return [chat_admission.stats(), itinerary_admission.stats()]
+
+@api_router.get("/admin/llm-pool")
+async def get_llm_pool_stats():
+    return chat_pool.stats()
+
+@api_router.get("/admin/response-cache")
+async def get_response_cache_stats():
+    return response_cache.stats()
+
+@api_router.get("/admin/itinerary-cache")
+async def get_itinerary_cache_stats():
+    return itinerary_cache.stats()
+
+@api_router.get("/admin/chat-writes")
+async def get_chat_write_stats():
+    return chat_writer.stats()
+
+@api_router.get("/admin/chat-context")
+async def get_chat_context_stats():
+    return chat_contexts.stats()
+
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Range", "Accept-Ranges", "Server-Timing", "Retry-After"],
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Outermost, so latency covers CORS and the whole response body
+app.add_middleware(
+    MetricsMiddleware,
+    server_timing_sample=float(os.environ.get('METRICS_SERVER_TIMING_SAMPLE', '0'))
 )
-logger = logging.getLogger(__name__)
+
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes(db)
+
+@app.on_event("startup")
+async def migrate_legacy_dates():
+    for collection, model in [
+        (db.destinations, Destination),
+        (db.events, Event),
+        (db.guides, LocalGuide),
+        (db.itineraries, Itinerary),
+        (db.chat_messages, ChatMessage),
+    ]:
+        # A date $toDate cannot parse must not keep the app from starting
+        try:
+            await migrate_datetime_fields(collection, model)
+        except (NotImplementedError, OperationFailure) as e:
+            logger.error("Skipping date migration for %s: %s", collection.name, e)
+
+@app.on_event("startup")
+async def backfill_geo_points():
+    for collection in (db.destinations, db.events, db.guides):
+        try:
+            await backfill_geo(collection)
+        except (NotImplementedError, OperationFailure) as e:
+            logger.warning("Skipping geo backfill for %s: %s", collection.name, e)
+
+@app.on_event("startup")
+async def sync_event_dates():
+    # Events stored before native dates get them parsed from `date`; yearly
+    # events are re-expanded so the calendar always reaches the horizon
+    updates, events = [], []
+    async for doc in db.events.find({"start_date": {"$exists": False}}, {**EVENT_CALENDAR_FIELDS, "date": 1}):
+        start, end = parse_event_dates(doc.get("date"))
+        updates.append(UpdateOne({"id": doc["id"]}, {"$set": {"start_date": start, "end_date": end}}))
+        events.append({**doc, "start_date": start, "end_date": end})
+    if updates:
+        await db.events.bulk_write(updates, ordered=False)
+        logger.info("Parsed dates of %d events", len(updates))
+    events += await db.events.find({"recurrence": {"$ne": None}}, EVENT_CALENDAR_FIELDS).to_list(None)
+    await sync_event_calendar(events)
+    if updates or events:
+        await catalog_changed("events")
+
+@app.on_event("startup")
+async def backfill_guide_search_fields():
+    # Re-derived for every guide, so stored values follow parser changes too
+    updates = []
+    fields = ("price_min", "price_max", "languages", "availability")
+    projection = {"_id": 0, "id": 1, "price_per_day": 1, **{field: 1 for field in fields}}
+    async for doc in db.guides.find({}, projection):
+        price_min, price_max = parse_price_range(doc.get("price_per_day"))
+        derived = {
+            "price_min": price_min,
+            "price_max": price_max,
+            "languages": normalize_languages(doc.get("languages") or []),
+            "availability": normalize_days(doc.get("availability") or []),
+        }
+        if any(field not in doc or doc[field] != derived[field] for field in fields):
+            updates.append(UpdateOne({"id": doc["id"]}, {"$set": derived}))
+    if updates:
+        await db.guides.bulk_write(updates, ordered=False)
+        logger.info("Parsed prices of %d guides", len(updates))
+        await catalog_changed("guides")
+
+@app.on_event("startup")
+async def offload_inline_images():
+    for collection in (db.destinations, db.events):
+        updates = []
+        async for doc in collection.find({"images": {"$regex": "^data:"}}, {"_id": 0, "id": 1, "images": 1}):
+            try:
+                images = await externalize_images(media_store, doc["images"])
+            except UnsupportedMediaType as e:
+                logger.warning("Leaving inline images of %s %s in place: %s", collection.name, doc["id"], e)
+                continue
+            updates.append(UpdateOne({"id": doc["id"]}, {"$set": {"images": images}}))
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+            logger.info("Moved inline images of %d %s into the media store", len(updates), collection.name)
+            await catalog_changed(collection.name)
+
+@app.on_event("startup")
+async def sync_image_variants():
+    changed = []
+    for collection in (db.destinations, db.events):
+        updates = []
+        async for doc in collection.find({}, {"_id": 0, "id": 1, "images": 1, "image_variants": 1}):
+            variants = variant_manifest.lookup(doc.get("images") or [])
+            if variants != doc.get("image_variants", []):
+                updates.append(UpdateOne({"id": doc["id"]}, {"$set": {"image_variants": variants}}))
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+            changed.append(collection.name)
+            logger.info("Refreshed image variants on %d %s", len(updates), collection.name)
+    if changed:
+        await catalog_changed(*changed)
+
+@app.on_event("startup")
+async def build_search_index():
+    await rebuild_search_index()
+
+@app.on_event("startup")
+async def start_chat_writer():
+    chat_writer.start()
+
+@app.on_event("shutdown")
+async def flush_chat_writer():
+    await chat_writer.stop()
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
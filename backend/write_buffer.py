@@ -0,0 +1,195 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from metrics import WRITE_BUFFER_DEAD_LETTERS
+
+logger = logging.getLogger(__name__)
+# One JSON line per document that could not be written, for replay by hand
+dead_letter_log = logging.getLogger(f"{__name__}.dead_letters")
+
+DUPLICATE_KEY = 11000
+
+
+class WriteBufferFull(RuntimeError):
+    """The queue stayed full for ``put_timeout`` seconds; the document was not queued."""
+
+
+class WriteBehindBuffer:
+    """Queues documents for one collection and writes them with ``insert_many``.
+
+    A background task flushes when ``max_batch`` documents are waiting or
+    ``flush_interval`` seconds have passed. A queued document is never
+    dropped: batches that fail to reach the database are re-queued, and
+    once ``max_queue`` documents are waiting ``put`` blocks for up to
+    ``put_timeout`` seconds, then raises WriteBufferFull. Documents the
+    database refuses outright (any write error but a duplicate key) go to
+    the dead-letter log instead of being retried forever.
+    """
+
+    def __init__(self, collection, max_batch: int = 100, flush_interval: float = 0.5,
+                 max_queue: int = 10000, put_timeout: float = 2.0):
+        self.collection = collection
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self.put_timeout = put_timeout
+        self._pending: List[dict] = []
+        self._writing: List[dict] = []
+        self._wake = asyncio.Event()
+        self._room = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.duplicates = 0
+        self.rejected_puts = 0
+        self.dead_letters = 0
+        self.total_flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    def __len__(self):
+        return len(self._pending)
+
+    @property
+    def full(self) -> bool:
+        return len(self._pending) >= self.max_queue
+
+    def holds(self, match: Callable[[dict], bool]) -> bool:
+        """Whether a document matching ``match`` is queued or being written."""
+        return any(match(doc) for doc in self._writing) or any(match(doc) for doc in self._pending)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and write everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._pending:
+            if not await self.flush():
+                logger.error("Database unreachable on shutdown; %d documents for %s go to the dead-letter log",
+                             len(self._pending), self.collection.name)
+                self._dead_letter([(doc, {"errmsg": "unwritten at shutdown"}) for doc in self._pending])
+                self._pending = []
+
+    async def put(self, doc: dict):
+        if self.full:
+            self._wake.set()
+            try:
+                await asyncio.wait_for(self._wait_for_room(), self.put_timeout)
+            except asyncio.TimeoutError:
+                self.rejected_puts += 1
+                raise WriteBufferFull(f"{len(self._pending)} documents waiting for {self.collection.name}")
+        self._pending.append(doc)
+        if len(self._pending) >= self.max_batch:
+            self._wake.set()
+
+    async def _wait_for_room(self):
+        while self.full:
+            self._room.clear()
+            await self._room.wait()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._pending:
+                await self.flush()
+
+    async def flush(self) -> bool:
+        """Write everything queued so far; returns False if a batch had to be re-queued."""
+        async with self._lock:
+            ok = True
+            while self._pending and ok:
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                self._writing = batch
+                try:
+                    ok = await self._write(batch)
+                finally:
+                    self._writing = []
+                if not self.full:
+                    self._room.set()
+            return ok
+
+    async def flush_matching(self, match: Callable[[dict], bool]) -> bool:
+        """Flush only when a document matching ``match`` has not landed yet."""
+        if not self.holds(match):
+            return True
+        return await self.flush()
+
+    async def _write(self, batch: List[dict]) -> bool:
+        started = time.perf_counter()
+        retry: List[dict] = []
+        try:
+            await self.collection.insert_many(batch, ordered=False)
+            self.written += len(batch)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            self.written += e.details.get("nInserted", 0)
+            # A re-queued batch may have partly landed before; its duplicates are done.
+            # Anything else the server refused it would refuse again.
+            self.duplicates += sum(1 for err in errors if err.get("code") == DUPLICATE_KEY)
+            self._dead_letter([(batch[err["index"]], err) for err in errors if err.get("code") != DUPLICATE_KEY])
+        except PyMongoError as e:
+            logger.warning("Write-behind flush of %d documents to %s failed: %s",
+                           len(batch), self.collection.name, e)
+            retry = batch
+
+        elapsed = time.perf_counter() - started
+        self.batches += 1
+        self.total_flush_seconds += elapsed
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+        if retry:
+            self.failed_batches += 1
+            self._pending[:0] = retry
+            return False
+        return True
+
+    def _dead_letter(self, rejected: List[tuple]):
+        for doc, error in rejected:
+            self.dead_letters += 1
+            WRITE_BUFFER_DEAD_LETTERS.inc(self.collection.name)
+            dead_letter_log.error(json.dumps({
+                "collection": self.collection.name,
+                "code": error.get("code"),
+                "error": error.get("errmsg"),
+                "document": doc,
+            }, default=str, ensure_ascii=False))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "collection": self.collection.name,
+            "queue_depth": len(self._pending),
+            "written": self.written,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "duplicates": self.duplicates,
+            "rejected_puts": self.rejected_puts,
+            "dead_letters": self.dead_letters,
+            "avg_batch_size": self.written / self.batches if self.batches else 0.0,
+            "flush_latency_ms": {
+                "last": round(self.last_flush_seconds * 1000, 2),
+                "avg": round(self.total_flush_seconds / self.batches * 1000, 2) if self.batches else 0.0,
+                "max": round(self.max_flush_seconds * 1000, 2),
+            },
+            "max_batch": self.max_batch,
+            "max_queue": self.max_queue,
+            "flush_interval": self.flush_interval,
+        }
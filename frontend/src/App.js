@@ -5,6 +5,24 @@ import axios from 'axios';
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
+// Card images: responsive WebP renditions from image_variants when the API has them
+const CARD_SIZES = "(min-width: 1024px) 33vw, (min-width: 768px) 50vw, 100vw";
+
+const cardImageProps = (item, fallback) => {
+  const image = item.image_variants && item.image_variants[0];
+  if (!image) {
+    return { src: (item.images && item.images[0]) || fallback };
+  }
+  const variants = Object.values(image.variants).sort((a, b) => a.width - b.width);
+  return {
+    src: (image.variants.medium || variants[0]).url,
+    srcSet: variants.map((v) => `${v.url} ${v.width}w`).join(", "),
+    sizes: CARD_SIZES,
+    loading: "lazy",
+    decoding: "async",
+  };
+};
+
 // Navigation Component
 const Navigation = ({ currentPage, setCurrentPage, searchQuery, setSearchQuery, handleSearch }) => (
   <nav className="bg-green-800 shadow-lg sticky top-0 z-50">
@@ -385,7 +403,7 @@ const DestinationsPage = () => {
           {filteredDestinations.map((destination) => (
             <div key={destination.id} className="bg-white rounded-xl shadow-lg overflow-hidden hover:shadow-xl transition duration-300">
               <img 
-                src={destination.images[0] || "https://images.unsplash.com/photo-1506905925346-21bda4d32df4"}
+                {...cardImageProps(destination, "https://images.unsplash.com/photo-1506905925346-21bda4d32df4")}
                 alt={destination.name}
                 className="w-full h-48 object-cover"
               />
@@ -781,7 +799,7 @@ const EventsPage = () => {
             <div key={event.id} className="bg-white rounded-xl shadow-lg overflow-hidden hover:shadow-xl transition duration-300">
               {event.images && event.images.length > 0 ? (
                 <img 
-                  src={event.images[0]}
+                  {...cardImageProps(event)}
                   alt={event.name}
                   className="w-full h-48 object-cover"
                 />
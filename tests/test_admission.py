@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionRejected, TokenBucket
+
+
+def test_token_bucket_allows_a_burst_then_asks_to_wait(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("admission.time.monotonic", lambda: now[0])
+    bucket = TokenBucket(rate=0.5, burst=2)
+    assert bucket.take("a") == 0 and bucket.take("a") == 0
+    assert bucket.take("a") == pytest.approx(2.0)
+    assert bucket.take("b") == 0
+    now[0] += 2
+    assert bucket.take("a") == 0
+
+
+def test_token_bucket_forgets_least_recent_keys():
+    bucket = TokenBucket(rate=1, burst=1, max_keys=2)
+    for key in "abc":
+        bucket.take(key)
+    assert len(bucket) == 2
+
+
+def test_throttle_answers_429_with_retry_after():
+    controller = AdmissionController("chat", rate=0.2, burst=1)
+    controller.throttle("s1")
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.throttle("s1")
+    assert rejected.value.status_code == 429
+    assert rejected.value.headers["Retry-After"] == "5"
+    assert controller.stats()["rejected"]["rate_limited"] == 1
+
+
+def test_slots_queue_then_shed():
+    async def scenario():
+        controller = AdmissionController("chat", max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        release = asyncio.Event()
+
+        async def hold():
+            async with controller.slot():
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        queued = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as full:
+            await controller.acquire()
+        with pytest.raises(AdmissionRejected) as timed_out:
+            await queued
+        release.set()
+        await holder
+        return controller, full.value, timed_out.value
+
+    controller, full, timed_out = asyncio.run(scenario())
+    assert full.status_code == timed_out.status_code == 503
+    stats = controller.stats()
+    assert stats["rejected"]["queue_full"] == 1
+    assert stats["rejected"]["queue_timeout"] == 1
+    assert stats["in_flight"] == 0 and stats["waiting"] == 0
+
+
+def test_check_capacity_takes_nothing():
+    async def scenario():
+        controller = AdmissionController("chat", max_concurrency=1, max_queue=0)
+        controller.check_capacity()
+        ticket = await controller.acquire()
+        with pytest.raises(AdmissionRejected):
+            controller.check_capacity()
+        controller.release(ticket)
+        return controller.stats()
+
+    assert asyncio.run(scenario())["in_flight"] == 0
@@ -0,0 +1,84 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from mongomock_motor import AsyncMongoMockClient
+from pydantic import BaseModel
+
+from bulk_ingest import ingest, iter_ndjson
+
+
+class Place(BaseModel):
+    id: str
+    name: str
+    slug: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    created_at: datetime = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+async def aiter(items):
+    for item in items:
+        yield item
+
+
+def run_ingest(items, **kwargs):
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"]["places"]
+        await collection.create_index("slug", unique=True)
+        reports = []
+        for batch in items:
+            reports.append(await ingest(collection, Place, aiter(batch), **kwargs))
+        docs = await collection.find({}, {"_id": 0}).sort("id").to_list(None)
+        return reports, docs
+
+    return asyncio.run(scenario())
+
+
+def test_bad_items_are_reported_by_position_and_the_rest_land():
+    def reject_closed(place):
+        if place.name == "Closed":
+            raise ValueError("place is closed")
+
+    written = []
+    [report], docs = run_ingest([[
+        {"id": "a", "name": "Hundru", "slug": "hundru"},
+        ValueError("Expecting value"),
+        ["not", "an", "object"],
+        {"id": "b", "name": 7},
+        {"id": "c", "name": "Closed", "slug": "closed"},
+        {"id": "d", "name": "Dassam", "slug": "dassam"},
+        {"id": "e", "name": "Copy", "slug": "hundru"},
+    ]], chunk_size=2, prepare=reject_closed, on_written=written.extend)
+
+    assert [doc["id"] for doc in docs] == ["a", "d"]
+    assert [error["index"] for error in report["errors"]] == [1, 2, 3, 4, 6]
+    assert report["errors"][0]["error"].startswith("Invalid JSON")
+    assert report["errors"][3]["error"] == "place is closed"
+    assert (report["received"], report["upserted"], report["failed"]) == (7, 2, 5)
+    assert [doc["id"] for doc in written] == ["a", "d"]
+
+
+def test_reingest_keeps_created_at_and_unsets_stale_geo():
+    first = {"id": "a", "name": "Hundru", "slug": "hundru", "latitude": 23.4, "longitude": 85.6,
+             "created_at": "2025-01-01T00:00:00Z"}
+    second = {"id": "a", "name": "Hundru Falls", "slug": "hundru", "created_at": "2026-06-01T00:00:00Z"}
+    reports, [doc] = run_ingest([[first], [second]])
+
+    assert reports[1]["modified"] == 1
+    assert doc["name"] == "Hundru Falls"
+    assert doc["created_at"].year == 2025
+    assert "geo" not in doc
+
+
+def test_ndjson_lines_parse_independently():
+    async def chunks():
+        for chunk in (b'{"id": 1}\n{bro', b'ken\n\n{"id": 2}'):
+            yield chunk
+
+    async def collect():
+        return [item async for item in iter_ndjson(chunks())]
+
+    first, broken, last = asyncio.run(collect())
+    assert first == {"id": 1} and last == {"id": 2}
+    assert isinstance(broken, ValueError)
@@ -0,0 +1,63 @@
+import asyncio
+
+from catalog_cache import CatalogCache, InMemoryBackend, RedisBackend, cache_key
+
+
+class FakeRedis:
+    """The async get/set(ex=)/incr subset RedisBackend uses."""
+
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def incr(self, key):
+        self.values[key] = int(self.values.get(key, 0)) + 1
+        return self.values[key]
+
+
+def read_through(backend):
+    async def scenario():
+        cache = CatalogCache(backend)
+        loads = []
+
+        async def loader():
+            loads.append(1)
+            return {"page": len(loads)}
+
+        key = cache_key("/destinations", category="eco", limit=None)
+        first = await cache.get_or_load("destinations", key, loader)
+        second = await cache.get_or_load("destinations", key, loader)
+        await cache.invalidate("events")
+        third = await cache.get_or_load("destinations", key, loader)
+        versions = await cache.invalidate("destinations")
+        fourth = await cache.get_or_load("destinations", key, loader)
+        return [first, second, third, fourth], versions, cache.stats()
+
+    return asyncio.run(scenario())
+
+
+def test_in_memory_reads_through_until_its_namespace_is_invalidated():
+    pages, versions, stats = read_through(InMemoryBackend())
+    assert pages == [{"page": 1}, {"page": 1}, {"page": 1}, {"page": 2}]
+    assert list(versions) == ["destinations"]
+    assert (stats["hits"], stats["misses"], stats["invalidations"]) == (2, 2, 2)
+
+
+def test_redis_backend_shares_versions_between_workers():
+    redis = FakeRedis()
+    pages, _, _ = read_through(RedisBackend(redis))
+    assert pages == [{"page": 1}, {"page": 1}, {"page": 1}, {"page": 2}]
+
+    async def other_worker():
+        return await CatalogCache(RedisBackend(redis)).version("destinations")
+
+    assert asyncio.run(other_worker()) == 1
+
+
+def test_cache_key_ignores_unset_params_and_order():
+    assert cache_key("/guides", b=2, a=1, c=None) == cache_key("/guides", a=1, b=2) == "/guides|a=1|b=2"
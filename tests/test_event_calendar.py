@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+from event_calendar import day_start, expand_occurrences, month_keys, occurrence_docs, parse_event_dates
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_parse_event_dates():
+    assert parse_event_dates("2025-12-28 to 2026-01-03") == (utc(2025, 12, 28), utc(2026, 1, 3))
+    assert parse_event_dates("2025-10-15") == (utc(2025, 10, 15), utc(2025, 10, 15))
+    assert parse_event_dates("Every full moon") == (None, None)
+
+
+def test_month_keys_cross_the_year():
+    assert month_keys(utc(2025, 11, 20), utc(2026, 2, 1)) == ["2025-11", "2025-12", "2026-01", "2026-02"]
+
+
+def test_yearly_span_over_new_year():
+    occurrences = expand_occurrences(utc(2025, 12, 28), utc(2026, 1, 3), "yearly", until_year=2027)
+    assert occurrences == [
+        (utc(2025, 12, 28), utc(2026, 1, 3)),
+        (utc(2026, 12, 28), utc(2027, 1, 3)),
+        (utc(2027, 12, 28), utc(2028, 1, 3)),
+    ]
+
+
+def test_occurrence_rows_for_a_year_crossing_event():
+    event = {"id": "tusu", "name": "Tusu Parab", "location": "Ranchi", "category": "festival",
+             "start_date": "2025-12-28", "end_date": "2026-01-03", "recurrence": "yearly"}
+    rows = occurrence_docs(event, until_year=2026)
+    assert [row["id"] for row in rows] == ["tusu:2025-12-28", "tusu:2026-12-28"]
+    assert rows[0]["months"] == ["2025-12", "2026-01"]
+    assert rows[1]["months"] == ["2026-12", "2027-01"]
+    assert all(row["recurring"] for row in rows)
+
+
+def test_leap_day_falls_back_in_common_years():
+    occurrences = expand_occurrences(utc(2024, 2, 29), utc(2024, 3, 1), "yearly", until_year=2025)
+    assert occurrences[1] == (utc(2025, 2, 28), utc(2025, 2, 28) + (utc(2024, 3, 1) - utc(2024, 2, 29)))
+
+
+def test_day_start_truncates_to_the_utc_day():
+    assert day_start("2024-02-29") == utc(2024, 2, 29)
+    assert day_start(utc(2024, 2, 29, 23, 30)) == utc(2024, 2, 29)
+
+
+def test_one_off_events_do_not_repeat():
+    assert expand_occurrences(utc(2025, 3, 21), utc(2025, 3, 21), None, until_year=2027) == [
+        (utc(2025, 3, 21), utc(2025, 3, 21)),
+    ]
+
+
+def test_lunar_festivals_use_their_listed_dates():
+    event = {"id": "karma", "name": "Karma Festival", "location": "Ranchi", "category": "festival",
+             "start_date": utc(2025, 9, 3), "end_date": utc(2025, 9, 4),
+             "occurrences": [datetime(2026, 8, 23), "2027-09-11"]}
+    rows = occurrence_docs(event, until_year=2030)
+    assert [(row["start"], row["end"]) for row in rows] == [
+        (utc(2025, 9, 3), utc(2025, 9, 4)),
+        (utc(2026, 8, 23), utc(2026, 8, 24)),
+        (utc(2027, 9, 11), utc(2027, 9, 12)),
+    ]
+    assert all(row["recurring"] for row in rows)
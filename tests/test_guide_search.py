@@ -0,0 +1,34 @@
+import pytest
+
+from guide_search import guide_query, normalize_days, parse_price_range
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("₹2000-3000", (2000, 3000)),
+    ("Rs 1,500/day", (1500, 1500)),
+    ("₹2k to ₹3.5k", (2000, 3500)),
+    ("INR 1200 - 1800 for groups of 6", (1200, 1800)),
+    ("1800 rupees per day", (1800, 1800)),
+    ("2500", (2500, 2500)),
+    # Head counts, hours and day counts are not prices
+    ("₹1500 per day (up to 4 people)", (1500, 1500)),
+    ("₹2,500/day for 8 hrs", (2500, 2500)),
+    ("₹3000 for 2 days", (3000, 3000)),
+    ("Contact for 2 day rates", (None, None)),
+    ("Negotiable", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_price_range(text, expected):
+    assert parse_price_range(text) == expected
+
+
+def test_normalize_days():
+    assert normalize_days(["Fri-Mon", "Wednesday"]) == ["Mon", "Wed", "Fri", "Sat", "Sun"]
+    assert normalize_days(["Weekends", "On request"]) == ["Sat", "Sun", "On request"]
+
+
+def test_price_filter_matches_overlapping_ranges():
+    assert guide_query(min_price=1000, max_price=2000) == {
+        "price_min": {"$lte": 2000},
+        "price_max": {"$gte": 1000},
+    }
@@ -0,0 +1,63 @@
+import json
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from http_cache import cached_json_response, dumps, etag_matches, make_etag, negotiate_encoding, not_modified
+
+VERSION = {"destinations": 1}
+BODY = dumps([{"id": str(i), "name": f"Destination {i}"} for i in range(100)])
+
+
+async def destinations(request):
+    etag = make_etag("destinations", VERSION["destinations"], "/destinations")
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    return cached_json_response(request, etag, BODY)
+
+
+client = TestClient(Starlette(routes=[Route("/destinations", destinations)]))
+
+
+def test_etag_matching():
+    etag = make_etag("events", 3, "/events|limit=10")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'W/{etag}', etag)
+    assert etag_matches(f'"other", {etag[:-1]}-gzip"', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(make_etag("events", 4, "/events|limit=10"), etag)
+    assert not etag_matches(None, etag)
+
+
+def test_encoding_negotiation():
+    assert negotiate_encoding("gzip;q=0.5, identity") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding(None) is None
+
+
+def test_conditional_get_and_invalidation():
+    first = client.get("/destinations", headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    assert first.json()[0]["name"] == "Destination 0"
+    etag = first.headers["etag"]
+
+    repeat = client.get("/destinations", headers={"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+
+    VERSION["destinations"] += 1
+    try:
+        changed = client.get("/destinations", headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != etag
+    finally:
+        VERSION["destinations"] -= 1
+
+
+def test_compressed_variant_revalidates_against_the_same_etag():
+    response = client.get("/destinations", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"].endswith('-gzip"')
+    assert response.json() == json.loads(BODY)
+    assert client.get("/destinations", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
@@ -0,0 +1,78 @@
+import asyncio
+import json
+
+from image_pipeline import MANIFEST_NAME, FakeImageGenerator, ImageJob, prompt_hash, run_pipeline
+
+JOBS = [ImageJob(f"image_{i}.png", f"Prompt number {i}") for i in range(6)]
+
+
+def run(jobs, generator, output_dir, **kwargs):
+    kwargs.setdefault("retry_base_delay", 0.0)
+    return asyncio.run(run_pipeline(jobs, generator, output_dir=output_dir, model="fake", **kwargs))
+
+
+class CountingGenerator(FakeImageGenerator):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = 0
+        self.peak = 0
+
+    async def generate_images(self, prompt, model, number_of_images=1):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().generate_images(prompt, model, number_of_images)
+        finally:
+            self.active -= 1
+
+
+def test_generates_every_image_with_bounded_concurrency(tmp_path):
+    generator = CountingGenerator(delay=0.01)
+    report = run(JOBS, generator, tmp_path, concurrency=2)
+    assert sorted(report["generated"]) == [job.filename for job in JOBS]
+    assert report["skipped"] == [] and report["failed"] == []
+    assert generator.peak == 2
+    assert all((tmp_path / job.filename).read_bytes().startswith(b"\x89PNG") for job in JOBS)
+
+    manifest = json.loads((tmp_path / MANIFEST_NAME).read_text())
+    assert manifest["image_0.png"]["prompt_hash"] == prompt_hash("Prompt number 0", "fake")
+
+
+def test_reruns_only_generate_missing_or_changed_images(tmp_path):
+    run(JOBS, FakeImageGenerator(), tmp_path)
+    (tmp_path / "image_1.png").unlink()
+    changed = [*JOBS[:2], ImageJob("image_2.png", "A different prompt"), *JOBS[3:]]
+
+    generator = FakeImageGenerator()
+    report = run(changed, generator, tmp_path)
+    assert sorted(report["generated"]) == ["image_1.png", "image_2.png"]
+    assert len(report["skipped"]) == 4
+    assert set(generator.calls) == {"Prompt number 1", "A different prompt"}
+
+    assert run(changed, FakeImageGenerator(), tmp_path)["generated"] == []
+    assert len(run(changed, FakeImageGenerator(), tmp_path, force=True)["generated"]) == 6
+
+
+def test_images_from_before_the_manifest_are_adopted(tmp_path):
+    (tmp_path / "image_0.png").write_bytes(b"hand-made")
+    report = run(JOBS[:1], FakeImageGenerator(), tmp_path)
+    assert report["skipped"] == ["image_0.png"]
+    assert (tmp_path / "image_0.png").read_bytes() == b"hand-made"
+    assert json.loads((tmp_path / MANIFEST_NAME).read_text())["image_0.png"]["model"] is None
+
+
+def test_transient_failures_are_retried(tmp_path):
+    generator = FakeImageGenerator(failures=2)
+    report = run(JOBS[:3], generator, tmp_path, max_attempts=3)
+    assert len(report["generated"]) == 3
+    assert all(count == 3 for count in generator.calls.values())
+
+
+def test_persistent_failures_are_reported_and_retried_next_run(tmp_path):
+    report = run(JOBS[:2], FakeImageGenerator(failures=5), tmp_path, max_attempts=2)
+    assert report["generated"] == []
+    assert sorted(f["filename"] for f in report["failed"]) == ["image_0.png", "image_1.png"]
+    assert report["failed"][0]["error"] == "fake generator failure"
+    assert not (tmp_path / "image_0.png").exists()
+
+    assert len(run(JOBS[:2], FakeImageGenerator(), tmp_path)["generated"]) == 2
@@ -0,0 +1,73 @@
+import asyncio
+
+from itinerary_cache import SingleFlightCache, canonical_itinerary_request, request_key
+
+
+def test_equivalent_requests_share_a_key():
+    a = canonical_itinerary_request(3, ["Eco", " culture"], "₹10,000", None)
+    b = canonical_itinerary_request(3, ["culture", "eco"], "Rs 10000", "")
+    assert request_key(a) == request_key(b)
+    assert request_key(a) != request_key(canonical_itinerary_request(4, ["eco", "culture"], "₹10,000"))
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = SingleFlightCache()
+        calls = []
+        gate = asyncio.Event()
+
+        async def load():
+            calls.append(1)
+            await gate.wait()
+            return {"plan": 1}
+
+        waiters = [asyncio.ensure_future(cache.get_or_create("k", load)) for _ in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*waiters)
+        again = await cache.get_or_create("k", load)
+        return calls, results, again, cache.stats()
+
+    calls, results, again, stats = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert sorted(status for _, status in results) == ["miss"] + ["shared"] * 4
+    assert again == ({"plan": 1}, "hit")
+    assert stats["in_flight"] == 0
+
+
+def test_a_load_running_across_clear_is_not_cached():
+    async def scenario():
+        cache = SingleFlightCache()
+        gate = asyncio.Event()
+        versions = iter(["stale", "fresh"])
+
+        async def load():
+            version = next(versions)
+            await gate.wait()
+            return version
+
+        first = asyncio.ensure_future(cache.get_or_create("k", load))
+        await asyncio.sleep(0)
+        cache.clear()
+        second = asyncio.ensure_future(cache.get_or_create("k", load))
+        await asyncio.sleep(0)
+        gate.set()
+        return await first, await second, await cache.get_or_create("k", load)
+
+    first, second, third = asyncio.run(scenario())
+    assert first == ("stale", "miss")
+    assert second == ("fresh", "miss")
+    assert third == ("fresh", "hit")
+
+
+def test_failed_loads_are_not_cached():
+    async def scenario():
+        cache = SingleFlightCache()
+
+        async def nothing():
+            return None
+
+        await cache.get_or_create("k", nothing)
+        return cache.has("k"), cache.stats()["entries"]
+
+    assert asyncio.run(scenario()) == (False, 0)
@@ -0,0 +1,155 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from llm import ChatClientPool
+
+
+class Client:
+    def __init__(self, session_id, **kwargs):
+        self.session_id = session_id
+        self.kwargs = kwargs
+
+
+def make_pool(**kwargs):
+    built = []
+
+    def factory(session_id, **factory_kwargs):
+        client = Client(session_id, **factory_kwargs)
+        built.append(client)
+        return client
+
+    return ChatClientPool(factory, **kwargs), built
+
+
+async def use(pool, session_id, **kwargs):
+    async with pool.session(session_id, **kwargs) as client:
+        return client
+
+
+def test_clients_are_reused_per_session():
+    async def main():
+        pool, built = make_pool()
+        first = await use(pool, "a", system_message="hi")
+        assert await use(pool, "a", system_message="ignored") is first
+        assert await use(pool, "b") is not first
+        return pool, built
+
+    pool, built = asyncio.run(main())
+    assert [c.session_id for c in built] == ["a", "b"]
+    assert built[0].kwargs == {"system_message": "hi"}
+    assert pool.stats()["created"] == 2 and pool.stats()["reused"] == 1
+
+
+def test_clients_are_replaced_after_max_uses():
+    async def main():
+        pool, built = make_pool(max_uses=2)
+        assert pool.needs_client("a")
+        clients = [await use(pool, "a") for _ in range(5)]
+        return pool, clients
+
+    pool, clients = asyncio.run(main())
+    assert clients[0] is clients[1] and clients[2] is clients[3] and clients[4] is not clients[3]
+    assert clients[1] is not clients[2]
+    assert pool.recycled == 2
+
+
+def test_needs_client_tracks_spent_clients():
+    async def main():
+        pool, _ = make_pool(max_uses=1)
+        assert pool.needs_client("a")
+        await use(pool, "a")
+        assert pool.needs_client("a")
+        pool.max_uses = None
+        assert not pool.needs_client("a")
+
+    asyncio.run(main())
+
+
+def test_least_recently_used_sessions_are_evicted():
+    async def main():
+        pool, _ = make_pool(max_sessions=2)
+        a = await use(pool, "a")
+        await use(pool, "b")
+        await use(pool, "a")
+        await use(pool, "c")
+        return pool, a
+
+    pool, _ = asyncio.run(main())
+    assert list(pool._entries) == ["a", "c"]
+    assert pool.evicted == 1
+
+
+def test_idle_sessions_are_evicted():
+    async def main():
+        pool, _ = make_pool(idle_ttl=0.02)
+        await use(pool, "a")
+        await asyncio.sleep(0.05)
+        await use(pool, "b")
+        return pool
+
+    pool = asyncio.run(main())
+    assert list(pool._entries) == ["b"]
+
+
+def test_requests_on_one_session_are_serialized():
+    async def main():
+        pool, _ = make_pool(max_concurrency=8)
+        active, peak = {"a": 0, "b": 0}, {"a": 0, "b": 0}
+
+        async def call(session_id):
+            async with pool.session(session_id):
+                active[session_id] += 1
+                peak[session_id] = max(peak[session_id], active[session_id])
+                await asyncio.sleep(0.01)
+                active[session_id] -= 1
+
+        await asyncio.gather(*(call(s) for s in "aaabbb"))
+        return pool, peak
+
+    pool, peak = asyncio.run(main())
+    assert peak == {"a": 1, "b": 1}
+    assert pool.in_flight == 0 and pool.waiting == 0
+
+
+def test_concurrency_is_bounded_across_sessions():
+    async def main():
+        pool, _ = make_pool(max_concurrency=2)
+        active, peak = [0], [0]
+
+        async def call(session_id):
+            async with pool.session(session_id):
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+                await asyncio.sleep(0.01)
+                active[0] -= 1
+
+        await asyncio.gather(*(call(str(i)) for i in range(6)))
+        return peak[0]
+
+    assert asyncio.run(main()) == 2
+
+
+def test_admission_is_entered_only_once_the_session_turn_comes():
+    async def main():
+        pool, _ = make_pool()
+        events = []
+
+        @asynccontextmanager
+        async def slot(name):
+            events.append(f"admit {name}")
+            try:
+                yield
+            finally:
+                events.append(f"release {name}")
+
+        async def call(name):
+            async with pool.session("a", admission=slot(name)):
+                events.append(f"run {name}")
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(call("first"), call("second"))
+        return events
+
+    # The second request holds no admission slot while it queues behind the first
+    assert asyncio.run(main()) == ["admit first", "run first", "release first",
+                                   "admit second", "run second", "release second"]
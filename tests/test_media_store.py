@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+
+import pytest
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from media_store import (FilesystemBlobStore, MediaTooLarge, UnsupportedMediaType, blob_response, check_image_type,
+                         externalize_images, media_url, parse_range)
+
+DATA = bytes(range(256)) * 1024  # 256 KiB, several read chunks
+
+
+def make_client(tmp_path):
+    store = FilesystemBlobStore(tmp_path)
+
+    async def upload(request: Request):
+        try:
+            check_image_type(request.headers.get("content-type", ""))
+        except UnsupportedMediaType as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        blob, created = await store.put_stream(request.stream(), request.headers["content-type"])
+        return JSONResponse({"hash": blob.digest, "url": media_url(blob.digest)}, status_code=201 if created else 200)
+
+    async def get(request: Request):
+        blob = await store.stat(request.path_params["digest"])
+        if blob is None:
+            raise HTTPException(status_code=404)
+        return blob_response(request, store, blob)
+
+    app = Starlette(routes=[Route("/media", upload, methods=["POST"]),
+                            Route("/media/{digest}", get, methods=["GET", "HEAD"])])
+    return store, TestClient(app)
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    for header in ("bytes=100-", "bytes=-0", "bytes=9-3"):
+        with pytest.raises(ValueError):
+            parse_range(header, 100)
+
+
+def test_store_deduplicates_and_cleans_up(tmp_path):
+    store = FilesystemBlobStore(tmp_path)
+
+    async def main():
+        first, created = await store.put(DATA, "image/png")
+        again, created_again = await store.put(DATA, "image/jpeg")
+        body = b"".join([chunk async for chunk in store.read(first.digest, 10, 20)])
+        with pytest.raises(MediaTooLarge):
+            await store.put_stream(_chunks([b"x" * 10, b"x" * 10]), "image/png", max_bytes=15)
+        return first, created, again, created_again, body
+
+    first, created, again, created_again, body = asyncio.run(main())
+    assert first.digest == hashlib.sha256(DATA).hexdigest() and first.size == len(DATA)
+    assert created and not created_again
+    # The duplicate keeps the first upload's metadata
+    assert again.content_type == "image/png"
+    assert body == DATA[10:21]
+    assert not list(tmp_path.glob(".upload-*"))
+
+
+async def _chunks(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_full_and_ranged_reads(tmp_path):
+    _, client = make_client(tmp_path)
+    digest = client.post("/media", content=DATA, headers={"Content-Type": "image/png"}).json()["hash"]
+
+    full = client.get(f"/media/{digest}")
+    assert full.status_code == 200 and full.content == DATA
+    assert full.headers["accept-ranges"] == "bytes" and full.headers["etag"] == f'"{digest}"'
+
+    part = client.get(f"/media/{digest}", headers={"Range": "bytes=70000-70009"})
+    assert part.status_code == 206 and part.content == DATA[70000:70010]
+    assert part.headers["content-range"] == f"bytes 70000-70009/{len(DATA)}"
+    assert part.headers["content-length"] == "10"
+
+    tail = client.get(f"/media/{digest}", headers={"Range": "bytes=-5"})
+    assert tail.status_code == 206 and tail.content == DATA[-5:]
+
+    # A stale If-Range means the client's copy changed; send the whole body
+    stale = client.get(f"/media/{digest}", headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+    assert stale.status_code == 200 and len(stale.content) == len(DATA)
+
+    assert client.get(f"/media/{digest}", headers={"If-None-Match": f'"{digest}"'}).status_code == 304
+    head = client.head(f"/media/{digest}")
+    assert head.status_code == 200 and head.headers["content-length"] == str(len(DATA)) and not head.content
+
+
+def test_unsatisfiable_range_is_416(tmp_path):
+    _, client = make_client(tmp_path)
+    digest = client.post("/media", content=DATA, headers={"Content-Type": "image/png"}).json()["hash"]
+    response = client.get(f"/media/{digest}", headers={"Range": f"bytes={len(DATA)}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{len(DATA)}"
+
+
+def test_non_raster_uploads_are_415(tmp_path):
+    _, client = make_client(tmp_path)
+    for content_type in ("image/svg+xml", "text/html", ""):
+        assert client.post("/media", content=b"<svg/>", headers={"Content-Type": content_type}).status_code == 415
+    assert not list(tmp_path.rglob("*"))
+    check_image_type("image/webp; q=1")
+
+    async def main():
+        return await externalize_images(FilesystemBlobStore(tmp_path), ["data:image/svg+xml;base64,PHN2Zy8+"])
+
+    with pytest.raises(UnsupportedMediaType):
+        asyncio.run(main())
+
+
+def test_legacy_non_image_blobs_download_as_attachments(tmp_path):
+    store, client = make_client(tmp_path)
+    blob, _ = asyncio.run(store.put(b"<svg onload=alert(1)/>", "image/svg+xml"))
+    response = client.get(f"/media/{blob.digest}")
+    assert response.headers["content-disposition"] == "attachment"
+    assert response.headers["x-content-type-options"] == "nosniff"
@@ -0,0 +1,51 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from pagination import InvalidCursor, decode_cursor, encode_cursor, fetch_page, keyset_query
+
+
+@pytest.mark.parametrize("value", [
+    datetime(2025, 10, 15, 6, 30, tzinfo=timezone.utc),
+    4.5,
+    "Ranchi",
+    None,
+])
+def test_cursor_round_trip(value):
+    cursor = encode_cursor(value, "doc-1")
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (value, "doc-1")
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor(1, "x")[:-3], "eyJ2IjoxfQ"])
+def test_bad_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+def test_keyset_query_continues_after_cursor():
+    after = encode_cursor(4.5, "b")
+    assert keyset_query({"location": "Ranchi"}, "rating", after, descending=True) == {"$and": [
+        {"location": "Ranchi"},
+        {"$or": [{"rating": {"$lt": 4.5}}, {"rating": 4.5, "id": {"$lt": "b"}}]},
+    ]}
+    assert keyset_query({}, "rating", None) == {}
+
+
+def test_fetch_page_walks_every_document_once_with_ties():
+    async def scenario():
+        collection = AsyncMongoMockClient()["test"]["guides"]
+        await collection.insert_many([{"id": f"g{i:02d}", "rating": i % 3} for i in range(10)])
+        seen, after = [], None
+        while True:
+            docs, after = await fetch_page(collection, {}, "rating", 4, after, descending=True,
+                                           projection={"_id": 0})
+            seen.extend(doc["id"] for doc in docs)
+            if after is None:
+                return seen
+
+    seen = asyncio.run(scenario())
+    assert sorted(seen) == [f"g{i:02d}" for i in range(10)]
+    assert seen[:4] == ["g08", "g05", "g02", "g07"]
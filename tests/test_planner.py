@@ -0,0 +1,68 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from planner import (haversine_matrix, nearest_neighbor_route, plan_route, prepare_catalog, route_length,
+                     split_days, two_opt)
+
+
+def test_haversine_ranchi_to_jamshedpur():
+    dist = haversine_matrix(np.array([23.3441, 22.8046]), np.array([85.3096, 86.2029]))
+    assert dist[0, 1] == pytest.approx(111, abs=2)
+    assert dist[0, 0] == 0 and dist[0, 1] == dist[1, 0]
+
+
+def test_two_opt_untangles_a_crossing_path():
+    # Points on a line visited out of order
+    xs = np.array([0.0, 2.0, 1.0, 3.0])
+    dist = np.abs(xs[:, None] - xs[None, :])
+    assert two_opt([0, 1, 2, 3], dist) == [0, 2, 1, 3]
+
+
+def test_two_opt_matches_brute_force_on_small_inputs():
+    rng = random.Random(3)
+    for _ in range(20):
+        points = np.array([[rng.uniform(0, 10), rng.uniform(0, 10)] for _ in range(7)])
+        dist = np.linalg.norm(points[:, None] - points[None, :], axis=-1)
+        route = two_opt(nearest_neighbor_route(dist), dist)
+        best = min(route_length([0, *rest], dist) for rest in itertools.permutations(range(1, 7)))
+        assert route[0] == 0 and sorted(route) == list(range(7))
+        # 2-opt is a local search; it should land close to the optimum
+        assert route_length(route, dist) <= best * 1.15 + 1e-9
+        assert route_length(route, dist) <= route_length(nearest_neighbor_route(dist), dist) + 1e-9
+
+
+def test_split_days_spreads_stops_evenly():
+    assert split_days([1, 2, 3, 4, 5], 3) == [[1, 2], [3, 4], [5]]
+    assert split_days([1], 3) == [[1], [], []]
+
+
+CATALOG = prepare_catalog([
+    {"name": "Hundru Falls", "category": "eco", "description": "waterfall", "latitude": 23.42, "longitude": 85.61},
+    {"name": "Dassam Falls", "category": "eco", "description": "waterfall", "latitude": 23.14, "longitude": 85.46},
+    {"name": "Betla National Park", "category": "eco", "description": "wildlife", "latitude": 23.89,
+     "longitude": 84.19},
+    {"name": "Jagannath Temple", "category": "cultural", "description": "temple", "latitude": 23.32,
+     "longitude": 85.28},
+    {"name": "Unlocated Museum", "category": "cultural", "description": "museum"},
+])
+
+
+def test_plan_picks_matching_destinations_and_splits_them_by_day():
+    plan = plan_route(CATALOG, ["waterfall", "wildlife"], days=2)
+    # Only the eco destinations match; the temple is left out
+    assert sorted(plan["destinations"]) == ["Betla National Park", "Dassam Falls", "Hundru Falls"]
+    assert [day["day"] for day in plan["days"]] == [1, 2]
+    assert [stop for day in plan["days"] for stop in day["stops"]] == plan["destinations"]
+    assert [len(day["stops"]) for day in plan["days"]] == [2, 1]
+    assert plan["total_distance_km"] == pytest.approx(sum(day["distance_km"] for day in plan["days"]), abs=0.2)
+    # Betla is far to the west, so it is visited last rather than between the two falls
+    assert plan["destinations"][-1] == "Betla National Park"
+
+
+def test_plan_skips_unlocated_destinations_and_empty_catalogs():
+    plan = plan_route(CATALOG, ["museum"], days=1)
+    assert "Unlocated Museum" not in plan["destinations"]
+    assert plan_route([], ["eco"], days=3) == {"destinations": [], "days": [], "total_distance_km": 0.0}
@@ -0,0 +1,37 @@
+import pytest
+
+from response_cache import ResponseCache
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("Is it safe to swim at Hundru Falls", "Is it unsafe to swim at Hundru Falls"),
+    ("Is it safe to swim at Hundru Falls", "Is it not safe to swim at Hundru Falls"),
+    ("Is it safe to swim at Hundru Falls?", "Isn't it safe to swim at Hundru Falls?"),
+    ("hotels near Ranchi station under 2000", "hotels near Ranchi station under 5000"),
+    ("3 day trip to Netarhat", "5 day trip to Netarhat"),
+])
+def test_near_misses_that_change_the_meaning(stored, asked):
+    cache = ResponseCache(threshold=0.8)
+    cache.store(stored, "cached answer")
+    assert cache.lookup(asked) is None
+    assert cache.stats()["similar_hits"] == 0
+
+
+@pytest.mark.parametrize("stored, asked", [
+    ("What is the best time to visit Hundru Falls?", "what is the best time to visit hundru fall"),
+    ("hotels near Ranchi station under 2000", "Hotels near Ranchi station, under 2000!"),
+    ("Is it safe to swim at Hundru Falls", "is it safe to swim in hundru falls"),
+    ("how far is Betla National Park from Ranchi", "how far is Betla Natinal Park from Ranchi"),
+])
+def test_rephrasings_still_hit(stored, asked):
+    cache = ResponseCache()
+    cache.store(stored, "cached answer")
+    assert cache.lookup(asked) == "cached answer"
+
+
+def test_clear_drops_everything():
+    cache = ResponseCache()
+    cache.store("Sarhul festival dates", "answer")
+    cache.clear()
+    assert cache.lookup("Sarhul festival dates") is None
+    assert len(cache) == 0
@@ -0,0 +1,45 @@
+from search_index import SearchIndex, tokenize
+
+
+def make_index():
+    index = SearchIndex({"destinations": {"name": 3.0, "description": 1.0}})
+    index.add_many("destinations", [
+        {"id": "hundru", "name": "Hundru Falls", "description": "A waterfall near Ranchi", "category": "eco"},
+        {"id": "dassam", "name": "Dassam Falls", "description": "Waterfall on the Kanchi river", "category": "eco"},
+        {"id": "jagannath", "name": "Jagannath Temple", "description": "Temple on a hill in Ranchi",
+         "category": "cultural"},
+        {"id": "rock", "name": "Rock Garden", "description": "Garden by a lake with falls in the monsoon",
+         "category": "eco"},
+    ])
+    return index
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("The Falls of Ranchi") == ["fall", "ranchi"]
+
+
+def test_name_matches_outrank_description_matches():
+    ranked = make_index().search("falls")["destinations"]
+    assert set(ranked[:2]) == {"hundru", "dassam"}
+    assert ranked[2] == "rock"
+
+
+def test_rarer_terms_weigh_more():
+    # "ranchi" is in two documents, "hundru" only in one
+    assert make_index().search("hundru ranchi")["destinations"][0] == "hundru"
+
+
+def test_category_filter():
+    assert make_index().search("ranchi", category="cultural")["destinations"] == ["jagannath"]
+
+
+def test_last_token_matches_as_prefix():
+    assert make_index().search("jagan")["destinations"] == ["jagannath"]
+    assert make_index().search("jagan ")["destinations"] == []
+
+
+def test_removed_documents_drop_out():
+    index = make_index()
+    index.remove("destinations", "hundru")
+    assert "hundru" not in index.search("hundru falls")["destinations"]
+    assert len(index) == 3
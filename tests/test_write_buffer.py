@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from write_buffer import DUPLICATE_KEY, WriteBehindBuffer, WriteBufferFull
+
+
+class FlakyCollection:
+    name = "chat_messages"
+
+    def __init__(self):
+        self.down = False
+        self.duplicate_ids = set()
+        self.invalid_ids = set()
+        self.docs = []
+
+    async def insert_many(self, docs, ordered=False):
+        if self.down:
+            raise AutoReconnect("connection refused")
+        errors = [{"index": i, "code": DUPLICATE_KEY} for i, doc in enumerate(docs) if doc["id"] in self.duplicate_ids]
+        errors += [{"index": i, "code": 121, "errmsg": "Document failed validation"}
+                   for i, doc in enumerate(docs) if doc["id"] in self.invalid_ids]
+        refused = self.duplicate_ids | self.invalid_ids
+        landed = [doc for doc in docs if doc["id"] not in refused]
+        self.docs.extend(landed)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(landed)})
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_failed_batches_are_retried_in_order():
+    async def scenario():
+        collection = FlakyCollection()
+        buffer = WriteBehindBuffer(collection, max_batch=2)
+        collection.down = True
+        for i in range(3):
+            await buffer.put({"id": str(i)})
+        assert not await buffer.flush()
+        assert len(buffer) == 3
+        collection.down = False
+        assert await buffer.flush()
+        return collection, buffer
+
+    collection, buffer = run(scenario())
+    assert [doc["id"] for doc in collection.docs] == ["0", "1", "2"]
+    assert buffer.stats()["failed_batches"] == 1
+    assert buffer.written == 3
+
+
+def test_full_queue_pushes_back_instead_of_dropping():
+    async def scenario():
+        collection = FlakyCollection()
+        collection.down = True
+        buffer = WriteBehindBuffer(collection, max_batch=2, max_queue=3, put_timeout=0.01)
+        for i in range(3):
+            await buffer.put({"id": str(i)})
+        await buffer.flush()
+        with pytest.raises(WriteBufferFull):
+            await buffer.put({"id": "3"})
+        return buffer
+
+    buffer = run(scenario())
+    assert [doc["id"] for doc in buffer._pending] == ["0", "1", "2"]
+    assert buffer.stats()["rejected_puts"] == 1
+
+
+def test_blocked_put_resumes_once_a_flush_makes_room():
+    async def scenario():
+        collection = FlakyCollection()
+        collection.down = True
+        buffer = WriteBehindBuffer(collection, max_batch=10, max_queue=2, put_timeout=5)
+        await buffer.put({"id": "0"})
+        await buffer.put({"id": "1"})
+        blocked = asyncio.ensure_future(buffer.put({"id": "2"}))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+        collection.down = False
+        await buffer.flush()
+        await blocked
+        await buffer.flush()
+        return collection
+
+    assert [doc["id"] for doc in run(scenario()).docs] == ["0", "1", "2"]
+
+
+def test_refused_documents_are_dead_lettered_not_retried(caplog):
+    async def scenario():
+        collection = FlakyCollection()
+        collection.invalid_ids = {"1"}
+        buffer = WriteBehindBuffer(collection, max_batch=10)
+        for i in range(3):
+            await buffer.put({"id": str(i)})
+        return await buffer.flush(), buffer
+
+    with caplog.at_level("ERROR", logger="write_buffer.dead_letters"):
+        ok, buffer = run(scenario())
+    assert ok
+    assert len(buffer) == 0
+    assert buffer.dead_letters == 1
+    assert '"id": "1"' in caplog.text
+
+
+def test_flush_matching_skips_other_sessions():
+    async def scenario():
+        collection = FlakyCollection()
+        buffer = WriteBehindBuffer(collection)
+        await buffer.put({"id": "a", "session_id": "s1"})
+        await buffer.flush_matching(lambda doc: doc["session_id"] == "s2")
+        untouched = len(buffer)
+        await buffer.flush_matching(lambda doc: doc["session_id"] == "s1")
+        return untouched, len(buffer)
+
+    assert run(scenario()) == (1, 0)
+
+
+def test_duplicates_from_a_partly_landed_batch_are_not_retried():
+    async def scenario():
+        collection = FlakyCollection()
+        collection.duplicate_ids = {"1"}
+        buffer = WriteBehindBuffer(collection, max_batch=10)
+        for i in range(3):
+            await buffer.put({"id": str(i)})
+        return await buffer.flush(), buffer
+
+    ok, buffer = run(scenario())
+    assert ok
+    assert len(buffer) == 0
+    assert buffer.duplicates == 1
+    assert buffer.written == 2
+
+
+def test_stop_writes_what_is_left():
+    async def scenario():
+        collection = FlakyCollection()
+        buffer = WriteBehindBuffer(collection, max_batch=100, flush_interval=60)
+        buffer.start()
+        await buffer.put({"id": "a"})
+        await buffer.stop()
+        return collection
+
+    assert [doc["id"] for doc in run(scenario()).docs] == ["a"]